@@ -83,7 +83,10 @@ def join_similar_named_meshes(context):
 
 # Class list to register
 _classes = [
+    gui.SDFXEffectSettings,
+    gui.SDFXEffectEntry,
     gui.IMPORT_OT_dff_custom,
+    gui.IMPORT_OT_dff_custom_modal,
     gui.EXPORT_OT_dff_custom,
     gui.EXPORT_OT_col,
     gui.OBJECT_OT_set_collision_objects,
@@ -115,9 +118,15 @@ _classes = [
     gui.SAEFFECTS_OT_AddTextInfo,
     gui.SAEFFECTS_OT_ExportInfo,
     gui.SAEFFECTS_OT_ExportTextInfo,
+    gui.SAEFFECTS_OT_ExportAllInfo,
     gui.SAEFFECTS_OT_CreateLightsFromOmni,
     gui.SAEFFECTS_OT_Import2dfx,
+    gui.SAEFFECTS_OT_Import2dfxBinary,
     gui.SAEFFECTS_OT_ViewLightInfo,
+    gui.SAEFFECTS_OT_RebuildRegistry,
+    gui.SAEFFECTS_OT_BulkEdit,
+    gui.SAEFFECTS_OT_LightsToCloud,
+    gui.SAEFFECTS_OT_CloudToLights,
     gui.SAEEFFECTS_OT_CreateLightsFromEntries,
     gui.OBJECT_PT_SDFXLightInfoPanel,
     gui.SAEEFFECTS_PT_Panel,
@@ -130,6 +139,14 @@ def register():
     for cls in _classes:
         register_class(cls)
 
+    gui.register_tdfx_handlers()
+
+    bpy.types.Object.sdfx = bpy.props.PointerProperty(
+        type=gui.SDFXEffectSettings
+    )
+    bpy.types.Scene.sdfx_effects = bpy.props.CollectionProperty(
+        type=gui.SDFXEffectEntry
+    )
     bpy.types.Scene.saeffects_export_path = bpy.props.StringProperty(
         name="Binary",
         description="Path to export the effects binary file",
@@ -140,6 +157,11 @@ def register():
         description="Path to export the effects text file",
         subtype='FILE_PATH'
     )
+    bpy.types.Scene.saeffects_indexed_export = bpy.props.BoolProperty(
+        name="Indexed Container",
+        description="Export the binary file as a seekable container with an offset table",
+        default=False
+    )
 
     if (2, 80, 0) > bpy.app.version:
         bpy.types.INFO_MT_file_import.append(gui.import_dff_func)
@@ -158,11 +180,16 @@ def unregister():
         bpy.types.TOPBAR_MT_file_export.remove(gui.export_dff_func)
         bpy.types.TOPBAR_MT_file_import.remove(gui.menu_func_import)  # Remove the IFP import option
 
-    for cls in reversed(_classes):
-        unregister_class(cls)
+    gui.unregister_tdfx_handlers()
 
+    del bpy.types.Object.sdfx
+    del bpy.types.Scene.sdfx_effects
     del bpy.types.Scene.saeffects_export_path
     del bpy.types.Scene.saeffects_text_export_path
+    del bpy.types.Scene.saeffects_indexed_export
+
+    for cls in reversed(_classes):
+        unregister_class(cls)
 
 if __name__ == "__main__":
     register()
@@ -1,6 +1,7 @@
 import bpy
-import struct
-from .dff_ot import EXPORT_OT_dff_custom, IMPORT_OT_dff_custom
+from . import tdfx_codec, tdfx_log
+from .dff_ot import EXPORT_OT_dff_custom, IMPORT_OT_dff_custom, IMPORT_OT_dff_custom_modal
+from .tdfx_ot import register_effects, export_effects
 from .col_ot import EXPORT_OT_col
 
 # Global variables
@@ -90,159 +91,44 @@ class OBJECT_PT_set_collision_objects_panel(bpy.types.Panel):
         row = layout.row()
         row.operator("object.set_collision_objects", text="Set Collision Objects")
 
+# Light settings given to lights through the menu
+light_info_defaults = dict(tdfx_codec.LIGHT_DEFAULTS, color=(15, 230, 0, 200))
+
 # Function to add light info to selected light objects
 def add_light_info(context):
+    added = []
     for obj in context.selected_objects:
         if obj.type == 'LIGHT':
-            obj["sdfx_drawdis"] = 100.0
-            obj["sdfx_outerrange"] = 18.0
-            obj["sdfx_size"] = 1.0
-            obj["sdfx_innerrange"] = 8.0
-            obj["sdfx_corona"] = "coronastar"
-            obj["sdfx_shad"] = "shad_exp"
-            obj["sdfx_lighttype"] = 1
-            obj["sdfx_color"] = (15, 230, 0, 200)  # Default color (RGBA)
-            obj["sdfx_OnAllDay"] = 1  # Default value for OnAllDay
-            obj["sdfx_showmode"] = 4
-            obj["sdfx_reflection"] = 0
-            obj["sdfx_flaretype"] = 0
-            obj["sdfx_shadcolormp"] = 40
-            obj["sdfx_shadowzdist"] = 0
-            obj["sdfx_flags2"] = 0
-            obj["sdfx_viewvector"] = (0, 156, 0)
-            print(f"Added GTA Light info to {obj.name}")
+            added.append(obj)
+            tdfx_log.debug("Added GTA Light info to %s", obj.name)
+    register_effects(added, context.scene,
+                     effects=[light_info_defaults] * len(added))
 
 # Function to add particle info to selected empty objects
 def add_particle_info(context):
+    added = []
     for obj in context.selected_objects:
         if obj.type == 'EMPTY':
-            obj["sdfx_psys"] = fx_psystems[0]  # Default particle system
-            print(f"Added GTA Particle system info to {obj.name}")
+            added.append(obj)
+            tdfx_log.debug("Added GTA Particle system info to %s", obj.name)
+    register_effects(added, context.scene)
 
 # Function to add 2D text info to selected plane objects
 def add_text_info(context):
+    added = []
     for obj in context.selected_objects:
         if obj.type == 'MESH' and "Plane" in obj.name:
-            obj["sdfx_text1"] = ""
-            obj["sdfx_text2"] = ""
-            obj["sdfx_text3"] = ""
-            obj["sdfx_text4"] = ""
-            print(f"Added GTA 2D Text info to {obj.name}")
+            added.append(obj)
+            tdfx_log.debug("Added GTA 2D Text info to %s", obj.name)
+    register_effects(added, context.scene)
 
 # Function to export info to a binary file
 def export_info(context):
     global effectfile
     global textfile
-    obj_to_exp = [obj for obj in context.selected_objects if any(key.startswith("sdfx_") for key in obj.keys())]
-    
-    if not obj_to_exp:
-        print("No objects with custom properties found for export.")
-        return
-
-    with open(effectfile, "wb") as effect_stream, open(textfile, "w") as text_stream:
-        # Write header info for binary file
-        effect_stream.write(len(obj_to_exp).to_bytes(4, byteorder='little'))
-        print(f"Number of objects to export: {len(obj_to_exp)}")
-        
-        # Write header info for text file
-        text_stream.write(f"NumEntries {len(obj_to_exp)}\n")
-        
-        for i, obj in enumerate(obj_to_exp, start=1):
-            print(f"Exporting object: {obj.name}, Type: {obj.type}")
-            text_stream.write(f"######################### {i} #########################\n")
-            if obj.type == 'LIGHT':
-                export_light_info(effect_stream, text_stream, obj)
-            elif obj.type == 'EMPTY':
-                export_particle_info(effect_stream, text_stream, obj)
-            elif obj.type == 'MESH' and "Plane" in obj.name:
-                export_text_info(effect_stream, text_stream, obj)
-
-def export_light_info(effect_stream, text_stream, obj):
-    pos = obj.location
-    color = obj["sdfx_color"]
-    corona_far_clip = obj["sdfx_drawdis"]
-    pointlight_range = obj["sdfx_outerrange"]
-    corona_size = obj["sdfx_size"]
-    shadow_size = obj["sdfx_innerrange"]
-    corona_show_mode = obj["sdfx_showmode"]
-    corona_enable_reflection = obj["sdfx_reflection"]
-    corona_flare_type = obj["sdfx_flaretype"]
-    shadow_color_multiplier = obj["sdfx_shadcolormp"]
-    flags1 = obj["sdfx_OnAllDay"]
-    corona_tex_name = obj["sdfx_corona"]
-    shadow_tex_name = obj["sdfx_shad"]
-    shadow_z_distance = obj["sdfx_shadowzdist"]
-    flags2 = obj["sdfx_flags2"]
-    view_vector = obj["sdfx_viewvector"]
-
-    print(f"Light Position: {pos}, Color: {color}")
-
-    effect_stream.write(bytearray(struct.pack("f", pos.x)))
-    effect_stream.write(bytearray(struct.pack("f", pos.y)))
-    effect_stream.write(bytearray(struct.pack("f", pos.z)))
-    effect_stream.write(bytearray(struct.pack("4B", int(color[0]), int(color[1]), int(color[2]), int(color[3]))))
-    effect_stream.write(bytearray(struct.pack("f", corona_far_clip)))
-    effect_stream.write(bytearray(struct.pack("f", pointlight_range)))
-    effect_stream.write(bytearray(struct.pack("f", corona_size)))
-    effect_stream.write(bytearray(struct.pack("f", shadow_size)))
-    effect_stream.write(bytearray(struct.pack("B", corona_show_mode)))
-    effect_stream.write(bytearray(struct.pack("B", corona_enable_reflection)))
-    effect_stream.write(bytearray(struct.pack("B", corona_flare_type)))
-    effect_stream.write(bytearray(struct.pack("B", shadow_color_multiplier)))
-    effect_stream.write(bytearray(struct.pack("B", flags1)))
-    effect_stream.write(bytearray(corona_tex_name.encode('utf-8')).ljust(24, b'\0'))
-    effect_stream.write(bytearray(shadow_tex_name.encode('utf-8')).ljust(24, b'\0'))
-    effect_stream.write(bytearray(struct.pack("B", shadow_z_distance)))
-    effect_stream.write(bytearray(struct.pack("B", flags2)))
-    effect_stream.write(bytearray(struct.pack("B", 0)))  # padding
-
-    # Write to text file
-    text_stream.write(f"2dfxType         LIGHT\n")
-    text_stream.write(f"Position         {pos.x} {pos.y} {pos.z}\n")
-    text_stream.write(f"Color            {int(color[0])} {int(color[1])} {int(color[2])} {int(color[3])}\n")
-    text_stream.write(f"CoronaFarClip    {corona_far_clip}\n")
-    text_stream.write(f"PointlightRange  {pointlight_range}\n")
-    text_stream.write(f"CoronaSize       {corona_size}\n")
-    text_stream.write(f"ShadowSize       {shadow_size}\n")
-    text_stream.write(f"CoronaShowMode   {corona_show_mode}\n")
-    text_stream.write(f"CoronaReflection {corona_enable_reflection}\n")
-    text_stream.write(f"CoronaFlareType  {corona_flare_type}\n")
-    text_stream.write(f"ShadowColorMP    {shadow_color_multiplier}\n")
-    text_stream.write(f"ShadowZDistance  {shadow_z_distance}\n")
-    text_stream.write(f"CoronaTexName    {corona_tex_name}\n")
-    text_stream.write(f"ShadowTexName    {shadow_tex_name}\n")
-    text_stream.write(f"Flags1           {flags1}\n")
-    text_stream.write(f"Flags2           {flags2}\n")
-    text_stream.write(f"ViewVector       {view_vector[0]} {view_vector[1]} {view_vector[2]}\n")
-
-def export_particle_info(effect_stream, text_stream, obj):
-    pos = obj.location
-    print(f"Particle Position: {pos}")
-    effect_stream.write(bytearray(struct.pack("f", pos.x)))
-    effect_stream.write(bytearray(struct.pack("f", pos.y)))
-    effect_stream.write(bytearray(struct.pack("f", pos.z)))
-    effect_stream.write(len(obj["sdfx_psys"]).to_bytes(4, byteorder='little'))
-    effect_stream.write(obj["sdfx_psys"].encode('utf-8'))
-
-    # Write to text file
-    text_stream.write(f"2dfxType         PARTICLE\n")
-    text_stream.write(f"Position         {pos.x} {pos.y} {pos.z}\n")
-    text_stream.write(f"ParticleSystem   {obj['sdfx_psys']}\n")
-
-def export_text_info(effect_stream, text_stream, obj):
-    pos = obj.location
-    print(f"Text Position: {pos}")
-    effect_stream.write(bytearray(struct.pack("f", pos.x)))
-    effect_stream.write(bytearray(struct.pack("f", pos.y)))
-    effect_stream.write(bytearray(struct.pack("f", pos.z)))
-    text_data = obj["sdfx_text1"] + obj["sdfx_text2"] + obj["sdfx_text3"] + obj["sdfx_text4"]
-    effect_stream.write(len(text_data).to_bytes(4, byteorder='little'))
-    effect_stream.write(text_data.encode('utf-8'))
-
-    # Write to text file
-    text_stream.write(f"2dfxType         TEXT\n")
-    text_stream.write(f"Position         {pos.x} {pos.y} {pos.z}\n")
-    text_stream.write(f"TextData         {obj['sdfx_text1']} {obj['sdfx_text2']} {obj['sdfx_text3']} {obj['sdfx_text4']}\n")
+    # Binary and text files come out of a single pass over the objects,
+    # which logs its own summary
+    return export_effects(context, binary_path=effectfile, text_path=textfile)
 
 class SAEEFFECTS_PT_Panel(bpy.types.Panel):
     bl_label = "DemonFF - 2DFX"
@@ -312,7 +198,12 @@ class SAEFFECTS_OT_ExportInfo(bpy.types.Operator):
         global textfile
         effectfile = bpy.path.abspath(context.scene.saeffects_export_path)
         textfile = bpy.path.abspath(context.scene.saeffects_text_export_path)
-        export_info(context)
+        try:
+            export_info(context)
+        except tdfx_codec.TdfxExportException as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, tdfx_log.stats.summary())
         return {'FINISHED'}
 
 def register_saeffects():
@@ -513,6 +404,8 @@ class DFF_MT_ExportChoice(bpy.types.Menu):
 #######################################################
 def import_dff_func(self, context):
     self.layout.operator(IMPORT_OT_dff_custom.bl_idname, text="DemonFF DFF (.dff)")
+    self.layout.operator(IMPORT_OT_dff_custom_modal.bl_idname,
+                         text="DemonFF DFF, in Background (.dff)")
 
 #######################################################
 def export_dff_func(self, context):
@@ -1,8 +1,11 @@
 import os
 import bpy
 import time
+from contextlib import contextmanager
 from bpy_extras.io_utils import ImportHelper, ExportHelper
 from ..ops import dff_exporter, dff_importer, col_importer, samp_exporter
+from . import tdfx_log, tdfx_ot
+from .tdfx_ot import import_dff_effects
 
 class EXPORT_OT_dff_custom(bpy.types.Operator, ExportHelper):
     
@@ -208,11 +211,8 @@ class EXPORT_OT_samp_custom(bpy.types.Operator, ExportHelper):
         return {'RUNNING_MODAL'}
 
 
-class IMPORT_OT_dff_custom(bpy.types.Operator, ImportHelper):
-    
-    bl_idname = "import_scene.dff_custom"
-    bl_description = 'Import a Custom Renderware DFF or COL File'
-    bl_label = "DFF/Col Import (.dff/.col)"
+class ImportDffOptions:
+    """Import options and per-file import shared by the DFF import operators"""
 
     filter_glob: bpy.props.StringProperty(default="*.dff;*.col",
                                           options={'HIDDEN'})
@@ -270,6 +270,12 @@ class IMPORT_OT_dff_custom(bpy.types.Operator, ImportHelper):
         name="Import Custom Normals",
         default=False
     )
+
+    import_2dfx: bpy.props.BoolProperty(
+        name="Import 2DFX",
+        description="Create objects for the model's 2d Effect sections",
+        default=False
+    )
     
     image_ext: bpy.props.EnumProperty(
         items=(
@@ -300,65 +306,259 @@ class IMPORT_OT_dff_custom(bpy.types.Operator, ImportHelper):
         layout.prop(self, "remove_doubles")
         layout.prop(self, "import_normals")
         layout.prop(self, "group_materials")
+        layout.prop(self, "import_2dfx")
         
+    #######################################################
+    def selected_files(self):
+        if self.files:
+            return [os.path.join(self.directory, file.name) for file in self.files]
+        return [self.filepath]
+
+    #######################################################
+    def import_file(self, context, file):
+        """Import one DFF or COL file."""
+        if file.endswith(".col"):
+            col_importer.import_col_file(file, os.path.basename(file))
+            return
+
+        image_ext = self.image_ext if self.load_images else None
+            
+        importer = dff_importer.import_dff(
+            {
+                'file_name': file,
+                'image_ext': image_ext,
+                'connect_bones': self.connect_bones,
+                'use_mat_split': self.read_mat_split,
+                'remove_doubles': self.remove_doubles,
+                'group_materials': self.group_materials,
+                'import_normals': self.import_normals
+            }, 
+            context
+        )
+
+        tdfx_log.debug("Imported DFF %s successfully", file)
+
+        if self.import_2dfx:
+            effects = import_dff_effects(importer, context)
+            if effects:
+                tdfx_log.debug("Imported %d 2DFX entries from %s", len(effects), file)
+
+        if importer.warning != "":
+            self.report({'WARNING'}, importer.warning)
+
+        version = importer.version
+
+        if version in ['0x33002', '0x34003', '0x36003']:
+            context.scene['custom_imported_version'] = version
+        else:
+            context.scene['custom_imported_version'] = "custom"
+            context.scene['custom_custom_version'] = "{}.{}.{}.{}".format(
+                version[2] if len(version) > 2 else '0',
+                version[3] if len(version) > 3 else '0',
+                version[4] if len(version) > 4 else '0',
+                version[6] if len(version) > 6 else '0',
+            )
+
+    #######################################################
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+# Property annotations are only registered from plain mixins, not from an
+# already registered operator class, so both import operators take theirs
+# from ImportDffOptions
+class IMPORT_OT_dff_custom(bpy.types.Operator, ImportDffOptions, ImportHelper):
+    
+    bl_idname = "import_scene.dff_custom"
+    bl_description = 'Import a Custom Renderware DFF or COL File'
+    bl_label = "DFF/Col Import (.dff/.col)"
+
+    #######################################################
     def execute(self, context):
         start = time.time()
 
-        for file in [os.path.join(self.directory, file.name) for file in self.files] if self.files else [self.filepath]:
-            if file.endswith(".col"):
-                col_importer.import_col_file(file, os.path.basename(file))
-            else:
-                image_ext = self.image_ext if self.load_images else None
-                    
-                importer = dff_importer.import_dff(
-                    {
-                        'file_name': file,
-                        'image_ext': image_ext,
-                        'connect_bones': self.connect_bones,
-                        'use_mat_split': self.read_mat_split,
-                        'remove_doubles': self.remove_doubles,
-                        'group_materials': self.group_materials,
-                        'import_normals': self.import_normals
-                    }, 
-                    context
-                )
-
-                print(f"Imported DFF {file} successfully")
-
-                if importer.warning != "":
-                    self.report({'WARNING'}, importer.warning)
-
-                version = importer.version
-
-                if version in ['0x33002', '0x34003', '0x36003']:
-                    context.scene['custom_imported_version'] = version
-                else:
-                    context.scene['custom_imported_version'] = "custom"
-                    context.scene['custom_custom_version'] = "{}.{}.{}.{}".format(
-                        version[2] if len(version) > 2 else '0',
-                        version[3] if len(version) > 3 else '0',
-                        version[4] if len(version) > 4 else '0',
-                        version[6] if len(version) > 6 else '0',
-                    )
+        for file in self.selected_files():
+            self.import_file(context, file)
         
         self.report({"INFO"}, f"Finished import in {time.time() - start:.2f}s")
 
         return {'FINISHED'}
 
-    def invoke(self, context, event):
-        context.window_manager.fileselect_add(self)
+# bpy.data collections whose new datablocks are removed when a background
+# import is cancelled
+rollback_data = (
+    "objects", "meshes", "materials", "textures", "images", "armatures",
+    "lights", "collections", "actions", "node_groups",
+)
+
+#######################################################
+@contextmanager
+def _window_context(window):
+    # Timers run without a window in the context, give them the one the
+    # import was started from (temp_override exists since Blender 3.2)
+    if window is not None and hasattr(bpy.context, "temp_override"):
+        with bpy.context.temp_override(window=window):
+            yield bpy.context
+    else:
+        yield bpy.context
+
+class IMPORT_OT_dff_custom_modal(bpy.types.Operator, ImportDffOptions, ImportHelper):
+    """
+    Import DFF/COL files one per timer step, redrawing the interface and
+    progress in between. Esc cancels and removes everything imported so far.
+
+    There is no background-thread parsing: each file is parsed and built on
+    the main thread, so a single large file blocks the interface until it
+    is done.
+    """
+    
+    bl_idname = "import_scene.dff_custom_modal"
+    bl_description = "Import DFF/COL files one at a time with progress. Esc cancels and removes everything imported so far"
+    bl_label = "DFF/Col Background Import (.dff/.col)"
+
+    # Scene properties written by import_file, put back on cancel
+    scene_properties = ("custom_imported_version", "custom_custom_version")
+
+    #######################################################
+    def execute(self, context):
+        self._files = self.selected_files()
+        self._sizes = {file: os.path.getsize(file) if os.path.exists(file) else 0
+                       for file in self._files}
+        self._total_bytes = sum(self._sizes.values())
+        self._done_files = 0
+        self._done_bytes = 0
+        self._objects = len(bpy.data.objects)
+        self._start = time.time()
+        self._error = None
+        self._finished = False
+        self._window = context.window
+
+        self._added = {name: [] for name in rollback_data}
+        self._scene = context.scene
+        self._scene_before = {key: self._scene[key] for key in self.scene_properties
+                              if key in self._scene}
+        self._entries_before = tdfx_ot.entries
+
+        wm = context.window_manager
+        wm.progress_begin(0, len(self._files))
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+
+        self._step_timer = self._step
+        bpy.app.timers.register(self._step_timer)
         return {'RUNNING_MODAL'}
 
+    #######################################################
+    def _step(self):
+        """
+        Import the next file. The interface is redrawn between files, a
+        single large file still blocks it until it is done.
+        """
+        if self._finished:
+            return None
+
+        file = self._files[self._done_files]
+        # Only what import_file adds is recorded, the user may add or remove
+        # datablocks between steps
+        before = {name: set(getattr(bpy.data, name)) for name in rollback_data}
+        try:
+            with _window_context(self._window) as context:
+                self.import_file(context, file)
+        except Exception as e:
+            self._error = e
+            self._finished = True
+            return None
+        finally:
+            for name in rollback_data:
+                self._added[name] += [block for block in getattr(bpy.data, name)
+                                      if block not in before[name]]
+
+        self._done_files += 1
+        self._done_bytes += self._sizes[file]
+        if self._done_files == len(self._files):
+            self._finished = True
+            return None
+
+        return 0.01
+
+    #######################################################
+    def progress_text(self):
+        return (f"DFF import: {self._done_files}/{len(self._files)} files, "
+                f"{len(bpy.data.objects) - self._objects} objects, "
+                f"{self._done_bytes / 1048576:.1f}/{self._total_bytes / 1048576:.1f} MB"
+                f" - Esc to cancel")
+
+    #######################################################
+    def rollback(self):
+        """
+        Remove the datablocks the import steps created and that still
+        exist, and put back the scene's imported version and the last
+        imported 2DFX entries.
+        """
+        removed = []
+        for name in rollback_data:
+            added = set(self._added[name])
+            removed += [block for block in getattr(bpy.data, name) if block in added]
+        if removed:
+            bpy.data.batch_remove(removed)
+
+        for key in self.scene_properties:
+            if key in self._scene_before:
+                self._scene[key] = self._scene_before[key]
+            elif key in self._scene:
+                del self._scene[key]
+        tdfx_ot.entries = self._entries_before
+        return len(removed)
+
+    #######################################################
+    def _end(self, context):
+        if bpy.app.timers.is_registered(self._step_timer):
+            bpy.app.timers.unregister(self._step_timer)
+
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    #######################################################
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._finished = True
+            self._end(context)
+            removed = self.rollback()
+            self.report({'WARNING'}, f"Import cancelled, removed {removed} datablocks.")
+            return {'CANCELLED'}
+
+        if event.type != 'TIMER' or event.timer != self._timer:
+            return {'PASS_THROUGH'}
+
+        context.window_manager.progress_update(self._done_files)
+        context.workspace.status_text_set(self.progress_text())
+
+        if not self._finished:
+            return {'PASS_THROUGH'}
+
+        self._end(context)
+        if self._error is not None:
+            removed = self.rollback()
+            self.report({'ERROR'}, f"Import failed, removed {removed} datablocks: {self._error}")
+            return {'CANCELLED'}
+
+        self.report({"INFO"}, f"Finished import of {len(self._files)} files "
+                              f"in {time.time() - self._start:.2f}s")
+        return {'FINISHED'}
 
 def register():
     bpy.utils.register_class(EXPORT_OT_dff_custom)
     bpy.utils.register_class(EXPORT_OT_samp_custom)
     bpy.utils.register_class(IMPORT_OT_dff_custom)
+    bpy.utils.register_class(IMPORT_OT_dff_custom_modal)
 
 def unregister():
     bpy.utils.unregister_class(EXPORT_OT_dff_custom)
     bpy.utils.unregister_class(EXPORT_OT_samp_custom)
     bpy.utils.unregister_class(IMPORT_OT_dff_custom)
+    bpy.utils.unregister_class(IMPORT_OT_dff_custom_modal)
 
 if __name__ == "__main__":
     register()
@@ -0,0 +1,1360 @@
+import argparse
+import io
+import math
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import tempfile
+import time
+
+try:
+    import numpy
+except ImportError:
+    # Text files and the count-prefixed writer work without NumPy, reading
+    # binaries and the indexed container need it
+    numpy = None
+
+#Information taken from https://gtamods.com/wiki/2DFX
+# & https://gtamods.com/wiki/2d_Effect_(RW_Section)
+
+# This module has no bpy dependency. Effects are passed around as plain
+# dicts with a "type" key ("LIGHT", "PARTICLE" or "TEXT"), a "position"
+# triple and the per-type fields listed in the *_DEFAULTS tables below.
+
+#######################################################
+# Binary record layouts (little-endian, no padding). These match byte for
+# byte what the old per-field struct.pack calls wrote.
+
+COUNT_STRUCT = struct.Struct("<I")
+
+# position, color, corona far clip, pointlight range, corona size,
+# shadow size, show mode, reflection, flare type, shadow color multiplier,
+# flags1, corona texture, shadow texture, shadow z distance, flags2, padding
+LIGHT_STRUCT = struct.Struct("<3f4B4f5B24s24s3B")
+
+# position and byte length of the name/text that follows the header
+PARTICLE_STRUCT = struct.Struct("<3fI")
+TEXT_STRUCT = struct.Struct("<3fI")
+
+# Structured dtype mirroring LIGHT_STRUCT, used to decode whole files at once
+if numpy is not None:
+    LIGHT_DTYPE = numpy.dtype([
+        ("position", "<f4", (3,)),
+        ("color", "u1", (4,)),
+        ("corona_far_clip", "<f4"),
+        ("pointlight_range", "<f4"),
+        ("corona_size", "<f4"),
+        ("shadow_size", "<f4"),
+        ("corona_show_mode", "u1"),
+        ("corona_enable_reflection", "u1"),
+        ("corona_flare_type", "u1"),
+        ("shadow_color_multiplier", "u1"),
+        ("flags1", "u1"),
+        ("corona_tex_name", "S24"),
+        ("shadow_tex_name", "S24"),
+        ("shadow_z_distance", "u1"),
+        ("flags2", "u1"),
+        ("padding", "u1"),
+    ])
+    assert LIGHT_DTYPE.itemsize == LIGHT_STRUCT.size
+
+LIGHT_DEFAULTS = {
+    "color": (255, 255, 255, 255),
+    "corona_far_clip": 100.0,
+    "pointlight_range": 18.0,
+    "corona_size": 1.0,
+    "shadow_size": 8.0,
+    "corona_show_mode": 4,
+    "corona_enable_reflection": 0,
+    "corona_flare_type": 0,
+    "shadow_color_multiplier": 40,
+    "flags1": 1,
+    "corona_tex_name": "coronastar",
+    "shadow_tex_name": "shad_exp",
+    "shadow_z_distance": 0,
+    "flags2": 0,
+    "view_vector": (0, 156, 0),
+}
+
+PARTICLE_DEFAULTS = {
+    "psys": "prt_blood",
+}
+
+TEXT_DEFAULTS = {
+    "text_data": "",
+    # Roadsign fields, only stored in the 2d Effect section
+    "size": (1.0, 1.0),
+    "rotation": (0.0, 0.0, 0.0),
+    "flags": 0,
+}
+
+#######################################################
+class TdfxImportException(Exception):
+    pass
+
+#######################################################
+class TdfxExportException(Exception):
+    pass
+
+#######################################################
+def _require_numpy(what, exception=TdfxImportException):
+    if numpy is None:
+        raise exception(f"{what} needs NumPy, which is not installed")
+
+#######################################################
+def _light_values(effect):
+    get = effect.get
+    pos = effect["position"]
+    color = get("color", LIGHT_DEFAULTS["color"])
+
+    return (
+        pos[0], pos[1], pos[2],
+        int(color[0]), int(color[1]), int(color[2]), int(color[3]),
+        get("corona_far_clip", 100.0),
+        get("pointlight_range", 18.0),
+        get("corona_size", 1.0),
+        get("shadow_size", 8.0),
+        int(get("corona_show_mode", 4)),
+        int(get("corona_enable_reflection", 0)),
+        int(get("corona_flare_type", 0)),
+        int(get("shadow_color_multiplier", 40)),
+        int(get("flags1", 1)),
+        get("corona_tex_name", "coronastar").encode('utf-8'),
+        get("shadow_tex_name", "shad_exp").encode('utf-8'),
+        int(get("shadow_z_distance", 0)),
+        int(get("flags2", 0)),
+        0
+    )
+
+#######################################################
+def _particle_payload(effect):
+    return effect.get("psys", PARTICLE_DEFAULTS["psys"]).encode('utf-8')
+
+#######################################################
+def _text_payload(effect):
+    return effect.get("text_data", "").encode('utf-8')
+
+# Table of effect type -> (fixed layout, fixed values, variable payload)
+RECORD_LAYOUTS = {
+    "LIGHT": (LIGHT_STRUCT, _light_values, None),
+    "PARTICLE": (PARTICLE_STRUCT, None, _particle_payload),
+    "TEXT": (TEXT_STRUCT, None, _text_payload),
+}
+
+#######################################################
+def _record_plan(effect):
+    layout, values_func, payload_func = RECORD_LAYOUTS[effect["type"]]
+
+    if payload_func is None:
+        return layout, values_func(effect), b""
+
+    payload = payload_func(effect)
+    pos = effect["position"]
+    return layout, (pos[0], pos[1], pos[2], len(payload)), payload
+
+#######################################################
+def pack_records(effects, buffer=None, offset=0):
+    """
+    Pack effect records into a single buffer.
+
+    Args:
+        effects: Iterable of effect dicts. Unknown types are skipped.
+        buffer: Optional preallocated bytearray. Allocated when omitted.
+        offset: Offset into buffer to start writing at.
+
+    Returns:
+        The buffer holding the packed records.
+    """
+    plans = [_record_plan(effect) for effect in effects
+             if effect["type"] in RECORD_LAYOUTS]
+
+    if buffer is None:
+        size = sum(layout.size + len(payload) for layout, _, payload in plans)
+        buffer = bytearray(offset + size)
+
+    for layout, values, payload in plans:
+        layout.pack_into(buffer, offset, *values)
+        offset += layout.size
+        if payload:
+            buffer[offset:offset + len(payload)] = payload
+            offset += len(payload)
+
+    return buffer
+
+#######################################################
+def pack_effects(effects):
+    """Pack a complete binary 2DFX file (count header and records)."""
+    effects = [effect for effect in effects
+               if effect["type"] in RECORD_LAYOUTS]
+
+    buffer = pack_records(effects, offset=COUNT_STRUCT.size)
+    COUNT_STRUCT.pack_into(buffer, 0, len(effects))
+    return buffer
+
+#######################################################
+def join_records(records):
+    """Splice already packed records into a complete binary 2DFX file."""
+    return COUNT_STRUCT.pack(len(records)) + b"".join(records)
+
+#######################################################
+# Validation, run over all effects before anything is packed or written
+
+# Light fields stored in a single byte
+LIGHT_BYTE_FIELDS = ("color", "corona_show_mode", "corona_enable_reflection",
+                     "corona_flare_type", "shadow_color_multiplier", "flags1",
+                     "shadow_z_distance", "flags2")
+
+LIGHT_FLOAT_FIELDS = ("corona_far_clip", "pointlight_range", "corona_size",
+                      "shadow_size")
+
+# String field -> maximum encoded length, per effect type. Light texture
+# names are fixed 24 byte slots in every format.
+STRING_LIMITS = {
+    "LIGHT": (("corona_tex_name", 24), ("shadow_tex_name", 24)),
+    "PARTICLE": (),
+    "TEXT": (),
+}
+
+# Particle names and text are length-prefixed in the count-prefixed format,
+# but fixed slots in the indexed container
+SLOT_LIMITS = {
+    "PARTICLE": (("psys", 24),),
+    "TEXT": (("text_data", 64),),
+}
+
+# String fields of each effect type, checked for the text format
+TEXT_STRING_FIELDS = {
+    "LIGHT": ("corona_tex_name", "shadow_tex_name"),
+    "PARTICLE": ("psys",),
+    "TEXT": ("text_data",),
+}
+
+# Encoding of the text format
+TEXT_ENCODING = 'latin-1'
+
+DEFAULTS = dict(LIGHT_DEFAULTS, **PARTICLE_DEFAULTS, **TEXT_DEFAULTS)
+
+# Fields holding more than one value
+FIELD_SIZES = {
+    "position": 3,
+    "color": 4,
+    "view_vector": 3,
+}
+
+# Numeric fields checked per effect type: (name, low, high), no range
+# check when low is None
+VALIDATED_FIELDS = {
+    "LIGHT": ([("position", None, None)] +
+              [(name, 0, 255) for name in LIGHT_BYTE_FIELDS] +
+              [(name, None, None) for name in LIGHT_FLOAT_FIELDS] +
+              [("view_vector", -128, 255)]),
+    "PARTICLE": [("position", None, None)],
+    "TEXT": [("position", None, None)],
+}
+
+# Number of problems listed in a TdfxExportException message
+MAX_REPORTED_ERRORS = 10
+
+#######################################################
+def _field_numbers(value, size):
+    """Return a field value as a list of size floats, or None if malformed."""
+    if size > 1:
+        if isinstance(value, (str, bytes)):
+            return None
+        try:
+            values = list(value)
+        except TypeError:
+            return None
+        if len(values) != size:
+            return None
+    else:
+        values = [value]
+
+    if any(isinstance(component, (str, bytes)) for component in values):
+        return None
+    try:
+        return [float(component) for component in values]
+    except (TypeError, ValueError):
+        return None
+
+#######################################################
+def _number_column(values, size):
+    """Return values as an (n, size) float array, or None if any is malformed."""
+    try:
+        column = numpy.asarray(values)
+    except (TypeError, ValueError):
+        return None
+    shape = (len(values), size) if size > 1 else (len(values),)
+    if column.dtype.kind not in "biuf" or column.shape != shape:
+        return None
+    return column.reshape(len(values), size).astype(numpy.float64)
+
+#######################################################
+def _bad_numbers(values, size, low, high):
+    """
+    Positions of the malformed, non-finite and out of range values of one
+    numeric field, as three sequences.
+
+    Well-formed columns are checked with NumPy masks in one go. A column
+    holding anything that isn't size numbers, or any column without NumPy,
+    is checked value by value.
+    """
+    column = _number_column(values, size) if numpy is not None and values else None
+    if column is not None:
+        finite = numpy.isfinite(column).all(axis=1)
+        in_range = finite
+        if low is not None:
+            in_range = finite & ((column >= low) & (column <= high)).all(axis=1)
+        return (), numpy.flatnonzero(~finite), numpy.flatnonzero(finite & ~in_range)
+
+    malformed, infinite, out_of_range = [], [], []
+    for position, value in enumerate(values):
+        numbers = _field_numbers(value, size)
+        if numbers is None:
+            malformed.append(position)
+        elif not all(math.isfinite(number) for number in numbers):
+            infinite.append(position)
+        elif low is not None and not all(low <= number <= high for number in numbers):
+            out_of_range.append(position)
+    return malformed, infinite, out_of_range
+
+#######################################################
+def _text_writable(value, encoding):
+    """Whether a string field fits on one line of a text file in encoding."""
+    value = str(value)
+    if "\n" in value or "\r" in value:
+        return False
+    try:
+        value.encode(encoding)
+    except UnicodeEncodeError:
+        return False
+    return True
+
+#######################################################
+def _problem_message(index, effect, name, problem, limit):
+    if problem == "type":
+        return f"entry {index}: unknown type {effect.get('type')!r}"
+
+    value = effect.get(name, DEFAULTS.get(name))
+    if problem == "malformed":
+        size = FIELD_SIZES.get(name, 1)
+        expected = f"{size} numbers" if size > 1 else "a number"
+        return f"entry {index}: {name} {value!r} is not {expected}"
+    if problem == "finite":
+        return f"entry {index}: {name} {value!r} is not finite"
+    if problem == "range":
+        return f"entry {index}: {name} {value!r} is out of range {limit[0]}-{limit[1]}"
+    if problem == "text":
+        return f"entry {index}: {name} {value!r} is not a single line of {limit} text"
+
+    length = len(str(value).encode('utf-8'))
+    return f"entry {index}: {name} is {length} bytes, at most {limit} fit"
+
+#######################################################
+def validate_effects(effects, fixed_slots=False, text_encoding=None):
+    """
+    Check every effect against the limits of the binary formats.
+
+    Nothing is packed or written, so a bad entry costs no partial file.
+    Each field is checked as one column, only the reported problems are
+    formatted per entry.
+
+    Args:
+        effects: Effect dicts about to be written.
+        fixed_slots: Also apply SLOT_LIMITS, for writers that store particle
+            names and text in fixed size slots.
+        text_encoding: Also check that string fields can be written as a
+            single line in this encoding, for the text writer.
+
+    Raises:
+        TdfxExportException listing the problems found.
+    """
+    effects = list(effects)
+
+    groups = {effect_type: [] for effect_type in STRING_LIMITS}
+    unknown = []
+    for index, effect in enumerate(effects):
+        groups.get(effect.get("type"), unknown).append(index)
+
+    # (positions, entry indices, field, problem, limit), where positions
+    # index into the group's entry indices and are in ascending order
+    problems = [(range(len(unknown)), unknown, None, "type", None)]
+
+    for effect_type, indices in groups.items():
+        if not indices:
+            continue
+
+        for name, low, high in VALIDATED_FIELDS[effect_type]:
+            default = DEFAULTS.get(name)
+            values = [effects[index].get(name, default) for index in indices]
+            bad = _bad_numbers(values, FIELD_SIZES.get(name, 1), low, high)
+            for positions, problem in zip(bad, ("malformed", "finite", "range")):
+                problems.append((positions, indices, name, problem, (low, high)))
+
+        limits = STRING_LIMITS[effect_type]
+        if fixed_slots:
+            limits += SLOT_LIMITS.get(effect_type, ())
+        for name, limit in limits:
+            default = DEFAULTS[name]
+            positions = [position for position, index in enumerate(indices)
+                         if len(str(effects[index].get(name, default)).encode('utf-8')) > limit]
+            problems.append((positions, indices, name, "length", limit))
+
+        if text_encoding is not None:
+            for name in TEXT_STRING_FIELDS[effect_type]:
+                default = DEFAULTS[name]
+                positions = [position for position, index in enumerate(indices)
+                             if not _text_writable(effects[index].get(name, default), text_encoding)]
+                problems.append((positions, indices, name, "text", text_encoding))
+
+    count = sum(len(positions) for positions, *_ in problems)
+    if not count:
+        return
+
+    # Each entry is checked field by field, so list the problems by entry
+    # and then in the order the fields were checked
+    first = []
+    for order, (positions, indices, name, problem, limit) in enumerate(problems):
+        for position in positions[:MAX_REPORTED_ERRORS]:
+            first.append((indices[position], order, name, problem, limit))
+    first.sort(key=lambda found: found[:2])
+
+    shown = "\n".join(_problem_message(index, effects[index], name, problem, limit)
+                      for index, _, name, problem, limit in first[:MAX_REPORTED_ERRORS])
+    more = count - MAX_REPORTED_ERRORS
+    if more > 0:
+        shown += f"\n... and {more} more"
+    raise TdfxExportException(
+        f"{count} problems found, nothing was written:\n{shown}")
+
+#######################################################
+def atomic_write(filepath, data):
+    """
+    Write data with a single write call to a temporary file next to
+    filepath, then rename it over filepath. Readers never see a partial
+    file, and a failed write leaves the previous file in place.
+    """
+    directory = os.path.dirname(os.path.abspath(filepath))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tdfx-", suffix=".tmp")
+    try:
+        # mkstemp files are private, keep the mode of the file being replaced
+        mode = os.stat(filepath).st_mode & 0o777 if os.path.exists(filepath) else 0o644
+        os.chmod(temp_path, mode)
+        with os.fdopen(fd, "wb") as stream:
+            stream.write(data)
+        os.replace(temp_path, filepath)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return len(data)
+
+#######################################################
+def write_effects(filepath, effects):
+    """Validate and pack effects, then write them to filepath atomically."""
+    validate_effects(effects)
+    return atomic_write(filepath, pack_effects(effects))
+
+#######################################################
+def read_light_columns(filepath):
+    """
+    Decode a binary light file written by export_info in a single pass.
+
+    The file is memory-mapped and viewed through LIGHT_DTYPE, so no Python
+    code runs per record or per field.
+
+    Returns:
+        Dict of field name -> NumPy array with one row per light.
+
+    Raises:
+        TdfxImportException if the file is not a light-only file.
+    """
+    _require_numpy("Reading binary 2DFX files")
+
+    with open(filepath, "rb") as effect_stream:
+        size = os.fstat(effect_stream.fileno()).st_size
+        if size < COUNT_STRUCT.size:
+            raise TdfxImportException(f"{filepath} is too small to be a 2DFX file")
+
+        with mmap.mmap(effect_stream.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            count, = COUNT_STRUCT.unpack_from(data, 0)
+            expected = COUNT_STRUCT.size + count * LIGHT_DTYPE.itemsize
+            if size != expected:
+                raise TdfxImportException(
+                    f"{filepath}: expected {count} light records ({expected} bytes), "
+                    f"got {size} bytes. Only light-only files can be read."
+                )
+
+            records = numpy.frombuffer(data, dtype=LIGHT_DTYPE, count=count,
+                                       offset=COUNT_STRUCT.size)
+            # Detach from the map before it is closed
+            records = records.copy()
+
+    # Particle and text records are shorter, so a mixed file can still
+    # have the size of a light-only one. The exporter always writes zero
+    # padding, which such a file would not keep in every record.
+    if records["padding"].any():
+        raise TdfxImportException(
+            f"{filepath} is not a light-only file. Only light-only files can be read.")
+
+    return {name: records[name] for name in LIGHT_DTYPE.names
+            if name != "padding"}
+
+#######################################################
+# Indexed container. Unlike the count-prefixed format above, every record
+# has a fixed size within its type's section and an offset table gives the
+# position of every entry, so readers can memory-map the file and jump
+# straight to any entry, slice or type.
+#
+#   header      magic, format version, section count, entry count
+#   directory   per section: type tag, record count, record size, offset
+#   offsets     per entry, in export order: absolute offset of its record
+#   sections    fixed-size records of one type each
+
+CONTAINER_MAGIC = b"2DFX"
+CONTAINER_VERSION = 1
+
+CONTAINER_HEADER_STRUCT = struct.Struct("<4sHHI")
+CONTAINER_SECTION_STRUCT = struct.Struct("<4sIII")
+
+if numpy is not None:
+    PARTICLE_DTYPE = numpy.dtype([
+        ("position", "<f4", (3,)),
+        ("psys", "S24"),
+    ])
+
+    TEXT_DTYPE = numpy.dtype([
+        ("position", "<f4", (3,)),
+        ("text_data", "S64"),
+    ])
+
+    # Effect type -> (section tag, record dtype)
+    CONTAINER_SECTIONS = {
+        "LIGHT": (b"LGHT", LIGHT_DTYPE),
+        "PARTICLE": (b"PRTC", PARTICLE_DTYPE),
+        "TEXT": (b"TEXT", TEXT_DTYPE),
+    }
+
+#######################################################
+def _container_records(effect_type, effects):
+    dtype = CONTAINER_SECTIONS[effect_type][1]
+
+    if effect_type == "LIGHT":
+        # LIGHT_STRUCT and LIGHT_DTYPE share one layout
+        return numpy.frombuffer(bytes(pack_records(effects)), dtype=dtype)
+
+    records = numpy.zeros(len(effects), dtype=dtype)
+    records["position"] = [effect["position"] for effect in effects]
+    if effect_type == "PARTICLE":
+        records["psys"] = [_particle_payload(effect) for effect in effects]
+    else:
+        records["text_data"] = [_text_payload(effect) for effect in effects]
+    return records
+
+#######################################################
+def pack_container(effects):
+    """
+    Pack effects into an indexed container.
+
+    Returns:
+        The container as bytes.
+    """
+    _require_numpy("Writing indexed containers", TdfxExportException)
+
+    effects = [effect for effect in effects if effect["type"] in CONTAINER_SECTIONS]
+
+    # Row of every effect within its type's section
+    by_type = {effect_type: [] for effect_type in CONTAINER_SECTIONS}
+    rows = []
+    for effect in effects:
+        group = by_type[effect["type"]]
+        rows.append((effect["type"], len(group)))
+        group.append(effect)
+
+    sections = [(effect_type, _container_records(effect_type, group))
+                for effect_type, group in by_type.items() if group]
+
+    offset = (CONTAINER_HEADER_STRUCT.size +
+              CONTAINER_SECTION_STRUCT.size * len(sections) +
+              COUNT_STRUCT.size * len(effects))
+
+    parts = [CONTAINER_HEADER_STRUCT.pack(CONTAINER_MAGIC, CONTAINER_VERSION,
+                                          len(sections), len(effects))]
+    section_offsets = {}
+    for effect_type, records in sections:
+        tag, dtype = CONTAINER_SECTIONS[effect_type]
+        parts.append(CONTAINER_SECTION_STRUCT.pack(tag, len(records), dtype.itemsize, offset))
+        section_offsets[effect_type] = offset
+        offset += records.nbytes
+
+    offsets = numpy.array([section_offsets[effect_type] +
+                           row * CONTAINER_SECTIONS[effect_type][1].itemsize
+                           for effect_type, row in rows], dtype="<u4")
+    parts.append(offsets.tobytes())
+    parts.extend(records.tobytes() for _, records in sections)
+
+    return b"".join(parts)
+
+#######################################################
+def write_container(filepath, effects):
+    validate_effects(effects, fixed_slots=True)
+    return atomic_write(filepath, pack_container(effects))
+
+#######################################################
+def is_container(filepath):
+    with open(filepath, "rb") as effect_stream:
+        return effect_stream.read(len(CONTAINER_MAGIC)) == CONTAINER_MAGIC
+
+#######################################################
+def _record_effect(effect_type, record):
+    effect = {"type": effect_type, "position": tuple(record["position"].tolist())}
+    for name in record.dtype.names:
+        if name in ("position", "padding"):
+            continue
+        value = record[name].tolist()
+        if isinstance(value, bytes):
+            value = value.decode('utf-8', 'ignore')
+        elif isinstance(value, list):
+            value = tuple(value)
+        effect[name] = value
+    return effect
+
+#######################################################
+class EffectContainer:
+    """
+    Memory-mapped reader of an indexed container.
+
+    Sections are exposed as NumPy record arrays viewing the mapped file, so
+    only the pages that are actually touched get read from disk.
+
+        with EffectContainer(path) as container:
+            lights = container.section("LIGHT")[1000:2000]
+            effect = container.entry(42)
+    """
+
+    def __init__(self, filepath):
+        _require_numpy("Reading indexed containers")
+
+        self.filepath = filepath
+        self._file = open(filepath, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise TdfxImportException(f"{filepath} is empty")
+
+        try:
+            magic, version, section_count, entry_count = \
+                CONTAINER_HEADER_STRUCT.unpack_from(self._map, 0)
+            if magic != CONTAINER_MAGIC or version != CONTAINER_VERSION:
+                raise TdfxImportException(f"{filepath} is not an indexed 2DFX container")
+
+            tags = {tag: effect_type
+                    for effect_type, (tag, _) in CONTAINER_SECTIONS.items()}
+            self.sections = {}
+            offset = CONTAINER_HEADER_STRUCT.size
+            for _ in range(section_count):
+                tag, count, size, data_offset = \
+                    CONTAINER_SECTION_STRUCT.unpack_from(self._map, offset)
+                offset += CONTAINER_SECTION_STRUCT.size
+
+                effect_type = tags.get(tag)
+                if effect_type is None:
+                    continue
+                dtype = CONTAINER_SECTIONS[effect_type][1]
+                if size != dtype.itemsize or data_offset + count * size > len(self._map):
+                    raise TdfxImportException(f"{filepath}: corrupt {tag!r} section")
+                self.sections[effect_type] = (data_offset, count)
+
+            self.offsets = numpy.frombuffer(self._map, dtype="<u4",
+                                            count=entry_count, offset=offset)
+        except (struct.error, ValueError) as e:
+            self.close()
+            raise TdfxImportException(f"{filepath}: truncated container ({e})")
+        except TdfxImportException:
+            self.close()
+            raise
+
+    #######################################################
+    def __enter__(self):
+        return self
+
+    #######################################################
+    def __exit__(self, *args):
+        self.close()
+
+    #######################################################
+    def close(self):
+        self.offsets = None
+        try:
+            self._map.close()
+        except BufferError:
+            # Section views are still alive, the map goes away with them
+            pass
+        self._file.close()
+
+    #######################################################
+    def __len__(self):
+        return len(self.offsets)
+
+    #######################################################
+    def count(self, effect_type):
+        return self.sections.get(effect_type, (0, 0))[1]
+
+    #######################################################
+    def section(self, effect_type):
+        """Record array of one type, viewing the mapped file."""
+        dtype = CONTAINER_SECTIONS[effect_type][1]
+        offset, count = self.sections.get(effect_type, (0, 0))
+        return numpy.frombuffer(self._map, dtype=dtype, count=count, offset=offset)
+
+    #######################################################
+    def _locate(self, offset):
+        for effect_type, (start, count) in self.sections.items():
+            size = CONTAINER_SECTIONS[effect_type][1].itemsize
+            if start <= offset < start + count * size:
+                return effect_type, (offset - start) // size
+        raise TdfxImportException(f"{self.filepath}: bad entry offset {offset}")
+
+    #######################################################
+    def entry(self, index):
+        """Decode entry index (in export order) without touching the others."""
+        effect_type, row = self._locate(int(self.offsets[index]))
+        return _record_effect(effect_type, self.section(effect_type)[row])
+
+    #######################################################
+    def effects(self, start=0, stop=None, types=None):
+        """Decode a slice of entries in export order, optionally by type."""
+        effects = []
+        for offset in self.offsets[start:stop].tolist():
+            effect_type, row = self._locate(offset)
+            if types is None or effect_type in types:
+                effects.append(_record_effect(effect_type, self.section(effect_type)[row]))
+        return effects
+
+    #######################################################
+    def light_columns(self, start=0, stop=None):
+        """Light section as columns, like read_light_columns."""
+        records = self.section("LIGHT")[start:stop].copy()
+        return {name: records[name] for name in LIGHT_DTYPE.names
+                if name != "padding"}
+
+#######################################################
+# 2d Effect RenderWare plugin section, stored in a Geometry's extension.
+# Entries carry a position, type and data size, followed by the data.
+
+EFFECT_SECTION_ID = 0x253F2F8
+
+# position, entry type, data size
+SECTION_ENTRY_STRUCT = struct.Struct("<3f2I")
+
+# color, corona far clip, pointlight range, corona size, shadow size,
+# show mode, reflection, flare type, shadow color multiplier, flags1,
+# corona texture, shadow texture, shadow z distance, flags2,
+# look direction, padding
+SECTION_LIGHT_STRUCT = struct.Struct("<4B4f5B24s24s2B3B2x")
+
+# particle effect name
+SECTION_PARTICLE_STRUCT = struct.Struct("<24s")
+
+# size, rotation, flags, four lines of 16 characters, padding
+SECTION_ROADSIGN_STRUCT = struct.Struct("<2f3fH64s2x")
+
+# Effect type -> section entry type
+SECTION_ENTRY_TYPES = {
+    "LIGHT": 0,
+    "PARTICLE": 1,
+    "TEXT": 7,
+}
+
+# Section entry type -> effect type of the entries decoded as raw data
+SECTION_RAW_TYPES = {
+    2: "PED_ATTRACTOR",
+    3: "SUN_GLARE",
+    4: "INTERIOR",
+    5: "ENTER_EXIT",
+    6: "STREET_SIGN",
+    8: "SLOT_MACHINE_WHEEL",
+    9: "COVER_POINT",
+    10: "ESCALATOR",
+}
+
+#######################################################
+def _decode_name(data):
+    return data.split(b"\0", 1)[0].decode('latin-1')
+
+#######################################################
+def _unpack_section_light(effect, data):
+    if len(data) >= SECTION_LIGHT_STRUCT.size:
+        values = SECTION_LIGHT_STRUCT.unpack_from(data)
+        effect["view_vector"] = values[17:20]
+    else:
+        # Lights without a look direction stop after flags2
+        values = SECTION_LIGHT_STRUCT.unpack_from(data.ljust(SECTION_LIGHT_STRUCT.size, b"\0"))
+
+    effect.update({
+        "color": values[0:4],
+        "corona_far_clip": values[4],
+        "pointlight_range": values[5],
+        "corona_size": values[6],
+        "shadow_size": values[7],
+        "corona_show_mode": values[8],
+        "corona_enable_reflection": values[9],
+        "corona_flare_type": values[10],
+        "shadow_color_multiplier": values[11],
+        "flags1": values[12],
+        "corona_tex_name": _decode_name(values[13]),
+        "shadow_tex_name": _decode_name(values[14]),
+        "shadow_z_distance": values[15],
+        "flags2": values[16],
+    })
+
+#######################################################
+def _unpack_section_particle(effect, data):
+    effect["psys"] = _decode_name(data[:SECTION_PARTICLE_STRUCT.size])
+
+#######################################################
+def _unpack_section_roadsign(effect, data):
+    values = SECTION_ROADSIGN_STRUCT.unpack_from(data)
+    text = values[6]
+    effect.update({
+        "size": values[0:2],
+        "rotation": values[2:5],
+        "flags": values[5],
+        "text_data": "".join(_decode_name(text[line:line + 16]).ljust(16)
+                             for line in range(0, 64, 16)).rstrip(),
+    })
+
+# Section entry type -> (effect type, decoder of the entry data)
+SECTION_ENTRY_DECODERS = {
+    0: ("LIGHT", _unpack_section_light),
+    1: ("PARTICLE", _unpack_section_particle),
+    7: ("TEXT", _unpack_section_roadsign),
+}
+
+#######################################################
+def unpack_effect_section(data, offset=0):
+    """
+    Decode the body of a 2d Effect plugin section.
+
+    Lights, particles and roadsigns become regular effect dicts. Other
+    entry types are kept as their raw data under "entry_type" and "data".
+
+    Args:
+        data: Buffer holding the section body, without the section header.
+        offset: Offset of the body in data.
+
+    Returns:
+        List of effect dicts.
+    """
+    data = memoryview(data)
+    try:
+        count, = COUNT_STRUCT.unpack_from(data, offset)
+        offset += COUNT_STRUCT.size
+
+        effects = []
+        for _ in range(count):
+            x, y, z, entry_type, size = SECTION_ENTRY_STRUCT.unpack_from(data, offset)
+            offset += SECTION_ENTRY_STRUCT.size
+            entry_data = bytes(data[offset:offset + size])
+            offset += size
+
+            if len(entry_data) != size:
+                raise TdfxImportException("2d Effect entry runs past the section")
+
+            decoder = SECTION_ENTRY_DECODERS.get(entry_type)
+            if decoder is None:
+                effects.append({
+                    "type": SECTION_RAW_TYPES.get(entry_type, "UNKNOWN"),
+                    "position": (x, y, z),
+                    "entry_type": entry_type,
+                    "data": entry_data,
+                })
+                continue
+
+            effect = {"type": decoder[0], "position": (x, y, z)}
+            decoder[1](effect, entry_data)
+            effects.append(effect)
+
+    except struct.error as e:
+        raise TdfxImportException(f"Truncated 2d Effect section: {e}")
+
+    return effects
+
+# Keys are padded to this width, values start after one more space
+TEXT_KEY_WIDTH = 16
+
+#######################################################
+def _text_value(line, key):
+    """
+    Return the value of a text line: everything after the key column, so
+    string values keep their leading and trailing spaces. Lines not padded
+    to the key column, e.g. edited by hand, drop the spaces after the key.
+    """
+    if (line.startswith(key) and len(line) > TEXT_KEY_WIDTH
+            and not line[len(key):TEXT_KEY_WIDTH + 1].strip()):
+        return line[TEXT_KEY_WIDTH + 1:]
+    return line.lstrip()[len(key):].lstrip()
+
+#######################################################
+def _text_parts(value, size):
+    parts = value.split()
+    if len(parts) != size:
+        raise ValueError(f"needs {size} values, got {len(parts)}")
+    return parts
+
+def _text_floats(size):
+    def convert(value):
+        return tuple(float(part) for part in _text_parts(value, size))
+    return convert
+
+def _text_ints(size):
+    def convert(value):
+        parts = _text_parts(value, size)
+        try:
+            return tuple(map(int, parts))
+        except ValueError:
+            # Older exports wrote some integer fields as floats
+            return tuple(int(float(part)) for part in parts)
+    return convert
+
+def _text_float(value):
+    return float(value)
+
+def _text_int(value):
+    return int(value)
+
+def _text_string(value):
+    return value
+
+# Text field name -> (effect field, converter of the rest of the line)
+TEXT_FIELDS = {
+    "Position":         ("position", _text_floats(3)),
+    "Color":            ("color", _text_ints(4)),
+    "CoronaFarClip":    ("corona_far_clip", _text_float),
+    "PointlightRange":  ("pointlight_range", _text_float),
+    "CoronaSize":       ("corona_size", _text_float),
+    "ShadowSize":       ("shadow_size", _text_float),
+    "CoronaShowMode":   ("corona_show_mode", _text_int),
+    "CoronaReflection": ("corona_enable_reflection", _text_int),
+    "CoronaFlareType":  ("corona_flare_type", _text_int),
+    "ShadowColorMP":    ("shadow_color_multiplier", _text_int),
+    "ShadowZDistance":  ("shadow_z_distance", _text_int),
+    "CoronaTexName":    ("corona_tex_name", _text_string),
+    "ShadowTexName":    ("shadow_tex_name", _text_string),
+    "Flags1":           ("flags1", _text_int),
+    "Flags2":           ("flags2", _text_int),
+    "ViewVector":       ("view_vector", _text_ints(3)),
+    "ParticleSystem":   ("psys", _text_string),
+    "TextData":         ("text_data", _text_string),
+}
+
+# Lines of a light block after its position: (key, effect field, values)
+LIGHT_TEXT_LINES = (
+    ("Color", "color", 4),
+    ("CoronaFarClip", "corona_far_clip", 1),
+    ("PointlightRange", "pointlight_range", 1),
+    ("CoronaSize", "corona_size", 1),
+    ("ShadowSize", "shadow_size", 1),
+    ("CoronaShowMode", "corona_show_mode", 1),
+    ("CoronaReflection", "corona_enable_reflection", 1),
+    ("CoronaFlareType", "corona_flare_type", 1),
+    ("ShadowColorMP", "shadow_color_multiplier", 1),
+    ("ShadowZDistance", "shadow_z_distance", 1),
+    ("CoronaTexName", "corona_tex_name", 1),
+    ("ShadowTexName", "shadow_tex_name", 1),
+    ("Flags1", "flags1", 1),
+    ("Flags2", "flags2", 1),
+    ("ViewVector", "view_vector", 3),
+)
+
+def _text_template(effect_type, lines):
+    header = f"{'2dfxType':<{TEXT_KEY_WIDTH}} {effect_type}\n"
+    return header + "".join(f"{key:<{TEXT_KEY_WIDTH}} {' '.join(['%s'] * size)}\n"
+                            for key, size in lines)
+
+# Whole blocks of each type, filled with a single %
+TEXT_TEMPLATES = {
+    "LIGHT": _text_template("LIGHT", [("Position", 3)] +
+                            [(key, size) for key, _, size in LIGHT_TEXT_LINES]),
+    "PARTICLE": _text_template("PARTICLE", [("Position", 3), ("ParticleSystem", 1)]),
+    "TEXT": _text_template("TEXT", [("Position", 3), ("TextData", 1)]),
+}
+
+#######################################################
+def parse_text(lines):
+    """
+    Parse the 2DFX text format into effect dicts.
+
+    Args:
+        lines: The file contents, or an iterable of lines such as an open
+            file.
+
+    Returns:
+        List of effect dicts, one per 2dfxType block.
+
+    Raises:
+        TdfxImportException if a value cannot be converted or has the wrong
+        number of components.
+    """
+    if isinstance(lines, str):
+        lines = lines.splitlines()
+
+    effects = []
+    effect = None
+    fields = TEXT_FIELDS
+
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+        if not stripped or stripped[0] == "#":
+            continue
+
+        key = stripped.split(None, 1)[0]
+        value = _text_value(line, key)
+
+        if key == "2dfxType":
+            effect = {"type": value.strip(), "position": (0.0, 0.0, 0.0)}
+            effects.append(effect)
+            continue
+
+        field = fields.get(key)
+        if effect is not None and field is not None:
+            try:
+                effect[field[0]] = field[1](value)
+            except ValueError as e:
+                raise TdfxImportException(f"Line {number}: bad {key} value {value!r} ({e})")
+
+    return effects
+
+#######################################################
+def read_text(filepath):
+    with open(filepath, 'r', encoding=TEXT_ENCODING) as file:
+        return parse_text(file)
+
+#######################################################
+def format_effect_text(effect):
+    """Format a single effect dict as a block of the 2DFX text format."""
+    effect_type = effect["type"]
+    values = list(effect["position"])
+
+    if effect_type == "LIGHT":
+        get = effect.get
+        for _, name, size in LIGHT_TEXT_LINES:
+            value = get(name, LIGHT_DEFAULTS[name])
+            if size > 1:
+                values.extend(int(part) for part in value)
+            else:
+                values.append(value)
+    elif effect_type == "PARTICLE":
+        values.append(effect.get("psys", PARTICLE_DEFAULTS["psys"]))
+    elif effect_type == "TEXT":
+        values.append(effect.get("text_data", ""))
+    else:
+        return _text_template(effect_type, [("Position", 3)]) % tuple(values)
+
+    return TEXT_TEMPLATES[effect_type] % tuple(values)
+
+#######################################################
+def format_text(effects):
+    """Format a complete 2DFX text file."""
+    chunks = [f"NumEntries {len(effects)}\n"]
+    for i, effect in enumerate(effects, start=1):
+        chunks.append(f"######################### {i} #########################\n")
+        chunks.append(format_effect_text(effect))
+    return "".join(chunks)
+
+#######################################################
+def write_text(filepath, effects):
+    """Validate and format effects, then write them to filepath atomically."""
+    validate_effects(effects, text_encoding=TEXT_ENCODING)
+    data = format_text(effects).replace("\n", os.linesep)
+    return atomic_write(filepath, data.encode(TEXT_ENCODING))
+
+#######################################################
+def columns_to_effects(columns):
+    """Convert columnar light data back into a list of effect dicts."""
+    names = [name for name in columns if name != "position"]
+    values = [columns[name].tolist() for name in names]
+    effects = []
+
+    for i, position in enumerate(columns["position"].tolist()):
+        effect = {"type": "LIGHT", "position": tuple(position)}
+        for name, column in zip(names, values):
+            value = column[i]
+            effect[name] = value.decode('utf-8', 'ignore') if isinstance(value, bytes) else value
+        effects.append(effect)
+
+    return effects
+
+#######################################################
+def read_binary(filepath):
+    """Read a binary 2DFX file, either an indexed container or light-only."""
+    if is_container(filepath):
+        with EffectContainer(filepath) as container:
+            return container.effects()
+    return columns_to_effects(read_light_columns(filepath))
+
+#######################################################
+# Headless conversion
+
+def convert_file(src, dst, to_binary, indexed=False):
+    """
+    Convert one file between the text and binary formats.
+
+    Args:
+        indexed: Write binaries as indexed containers.
+
+    Returns:
+        Number of effects converted.
+
+    Raises:
+        TdfxExportException if a count-prefixed binary would hold more than
+        lights. Its records have no type tag, so only light-only files can
+        be converted back to text.
+    """
+    if to_binary:
+        effects = read_text(src)
+        if indexed:
+            write_container(dst, effects)
+        else:
+            others = sum(effect.get("type") != "LIGHT" for effect in effects)
+            if others:
+                raise TdfxExportException(
+                    f"{src} has {others} particle or text entries, which can't be read "
+                    f"back from a count-prefixed binary. Use --indexed.")
+            write_effects(dst, effects)
+    else:
+        effects = read_binary(src)
+        write_text(dst, effects)
+    return len(effects)
+
+#######################################################
+def _convert_job(job):
+    src, dst, to_binary, indexed = job
+    try:
+        os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+        return src, convert_file(src, dst, to_binary, indexed), None
+    except Exception as e:
+        return src, 0, f"{type(e).__name__}: {e}"
+
+#######################################################
+def collect_jobs(src, dst, src_ext, dst_ext, to_binary, indexed=False):
+    """
+    List (source, destination, to_binary, indexed) jobs for a file or a
+    directory tree.
+
+    Directory trees are mirrored below dst, or converted next to the sources
+    when dst is None.
+
+    Raises:
+        TdfxImportException if src does not exist.
+    """
+    if not os.path.exists(src):
+        raise TdfxImportException(f"{src} does not exist")
+
+    if os.path.isfile(src):
+        if dst is None or os.path.isdir(dst):
+            name = os.path.splitext(os.path.basename(src))[0] + dst_ext
+            dst = os.path.join(dst if dst else os.path.dirname(src), name)
+        return [(src, dst, to_binary, indexed)]
+
+    jobs = []
+    src_ext = src_ext.lower()
+    for root, _, files in os.walk(src):
+        for name in sorted(files):
+            if not name.lower().endswith(src_ext):
+                continue
+
+            out_dir = os.path.join(dst, os.path.relpath(root, src)) if dst else root
+            out_name = name[:-len(src_ext)] + dst_ext
+            jobs.append((os.path.join(root, name), os.path.join(out_dir, out_name),
+                         to_binary, indexed))
+
+    return jobs
+
+#######################################################
+def convert_tree(jobs, processes=None):
+    """
+    Run conversion jobs across a multiprocessing pool.
+
+    Returns:
+        List of (source, effect count, error or None), in completion order.
+    """
+    if len(jobs) < 2 or processes == 1:
+        return [_convert_job(job) for job in jobs]
+
+    chunksize = max(1, len(jobs) // ((processes or os.cpu_count() or 1) * 4))
+    with multiprocessing.Pool(processes) as pool:
+        return list(pool.imap_unordered(_convert_job, jobs, chunksize))
+
+#######################################################
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Convert GTA SA 2DFX files between text and binary without Blender"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for command, src_ext, dst_ext in (("to-binary", ".2dfx", ".bin"),
+                                      ("to-text", ".bin", ".2dfx")):
+        sub = subparsers.add_parser(command)
+        sub.add_argument("src", help="Source file or directory")
+        sub.add_argument("dst", nargs="?", help="Destination file or directory")
+        sub.add_argument("--src-ext", default=src_ext,
+                         help=f"Source extension in directories (default {src_ext})")
+        sub.add_argument("--dst-ext", default=dst_ext,
+                         help=f"Destination extension (default {dst_ext})")
+        sub.add_argument("-j", "--jobs", type=int, default=None,
+                         help="Worker processes (default: CPU count)")
+        if command == "to-binary":
+            sub.add_argument("--indexed", action="store_true",
+                             help="Write indexed containers instead of the count-prefixed "
+                                  "format, needed for files with particles or text")
+
+    bench = subparsers.add_parser("bench", help="Benchmark the binary and text light writers")
+    bench.add_argument("--count", type=int, default=20000)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "bench":
+        result = benchmark_light_export(args.count)
+        print(f"binary per-field: {result['per_field']:.4f}s, "
+              f"packed: {result['packed']:.4f}s, "
+              f"speedup: {result['speedup']:.1f}x")
+        result = benchmark_text_export(args.count)
+        print(f"text write: {result['write']:.4f}s, "
+              f"parse: {result['parse']:.4f}s")
+        return 0
+
+    to_binary = args.command == "to-binary"
+    try:
+        jobs = collect_jobs(args.src, args.dst, args.src_ext, args.dst_ext, to_binary,
+                            getattr(args, "indexed", False))
+    except TdfxImportException as e:
+        print(e, file=sys.stderr)
+        return 1
+    if not jobs:
+        print(f"No {args.src_ext} files found in {args.src}", file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    results = convert_tree(jobs, args.jobs)
+
+    failed = 0
+    effects = 0
+    for src, count, error in results:
+        if error:
+            failed += 1
+            print(f"{src}: {error}", file=sys.stderr)
+        effects += count
+
+    print(f"Converted {len(results) - failed}/{len(results)} files "
+          f"({effects} effects) in {time.perf_counter() - start:.2f}s")
+    return 1 if failed else 0
+
+#######################################################
+def _write_light_per_field(effect_stream, effect):
+    # The pre-codec export path, kept only as the benchmark baseline
+    values = _light_values(effect)
+    for value in values[:3]:
+        effect_stream.write(bytearray(struct.pack("f", value)))
+    effect_stream.write(bytearray(struct.pack("4B", *values[3:7])))
+    for value in values[7:11]:
+        effect_stream.write(bytearray(struct.pack("f", value)))
+    for value in values[11:16]:
+        effect_stream.write(bytearray(struct.pack("B", value)))
+    effect_stream.write(bytearray(values[16]).ljust(24, b'\0'))
+    effect_stream.write(bytearray(values[17]).ljust(24, b'\0'))
+    for value in values[18:]:
+        effect_stream.write(bytearray(struct.pack("B", value)))
+
+#######################################################
+def benchmark_light_export(count=20000, repeat=5):
+    """
+    Compare the per-field export path against the precompiled packer.
+
+    Returns:
+        Dict with the best time in seconds of each path and the speedup.
+    """
+    effects = [
+        {"type": "LIGHT",
+         "position": (i * 0.5, i * 0.25, 10.0),
+         "color": (i % 256, 128, 64, 255),
+         "corona_size": 1.0 + (i % 7)}
+        for i in range(count)
+    ]
+
+    def per_field():
+        stream = io.BytesIO()
+        stream.write(len(effects).to_bytes(4, byteorder='little'))
+        for effect in effects:
+            _write_light_per_field(stream, effect)
+        return stream.getvalue()
+
+    def packed():
+        stream = io.BytesIO()
+        stream.write(pack_effects(effects))
+        return stream.getvalue()
+
+    if per_field() != packed():
+        raise AssertionError("Packed output differs from the per-field path")
+
+    results = _best_times((("per_field", per_field), ("packed", packed)), repeat)
+    results["speedup"] = results["per_field"] / results["packed"]
+    return results
+
+#######################################################
+def benchmark_text_export(count=20000, repeat=5):
+    """
+    Time writing a text file with write_text and reading it back with
+    read_text, and check the text round-trips exactly.
+
+    Returns:
+        Dict with the best write and parse times in seconds.
+    """
+    # float32 positions, the way they come out of Blender
+    floats = struct.unpack(f"<{count * 3}f",
+                           struct.pack(f"<{count * 3}f", *(i * 0.37 for i in range(count * 3))))
+    effects = [
+        {"type": "LIGHT",
+         "position": floats[i * 3:i * 3 + 3],
+         "color": (i % 256, 128, 64, 255),
+         "corona_size": 1.0 + (i % 7)}
+        for i in range(count)
+    ]
+
+    with tempfile.TemporaryDirectory() as directory:
+        filepath = os.path.join(directory, "bench.2dfx")
+
+        def write():
+            write_text(filepath, effects)
+
+        def parse():
+            return read_text(filepath)
+
+        results = _best_times((("write", write),), repeat)
+        if format_text(parse()) != format_text(effects):
+            raise AssertionError("Text does not round-trip")
+        results.update(_best_times((("parse", parse),), repeat))
+
+    return results
+
+#######################################################
+def _best_times(funcs, repeat):
+    results = {}
+    for name, func in funcs:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = best
+    return results
+
+if __name__ == "__main__":
+    sys.exit(main())
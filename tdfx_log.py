@@ -0,0 +1,121 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# This module has no bpy dependency. Per-entry messages are logged at
+# DEBUG, so by default only warnings and the one-line summaries of each
+# import or export reach the console. Set TDFX_LOG_LEVEL=DEBUG, or call
+# set_level("DEBUG"), to get the per-entry lines back.
+
+log = logging.getLogger("tdfx")
+
+if not log.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("2DFX %(levelname)s: %(message)s"))
+    log.addHandler(_handler)
+    log.propagate = False
+
+_level = os.environ.get("TDFX_LOG_LEVEL", "INFO").upper()
+if isinstance(logging.getLevelName(_level), int):
+    log.setLevel(_level)
+else:
+    log.setLevel(logging.INFO)
+    log.warning("Unknown TDFX_LOG_LEVEL %r, using INFO", _level)
+
+#######################################################
+def set_level(level):
+    """Set the log level by name ("DEBUG", "INFO", ...) or number."""
+    log.setLevel(level.upper() if isinstance(level, str) else level)
+
+debug = log.debug
+info = log.info
+warning = log.warning
+error = log.error
+
+#######################################################
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024.0
+
+#######################################################
+class Stats:
+    """
+    Per-phase timers and counters of one import or export.
+
+    Counters and timers keep their insertion order, which is the order the
+    summary lists them in. Both can be updated from worker threads.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.counters = {}
+        self.timers = {}
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    #######################################################
+    def count(self, counter, amount=1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    #######################################################
+    @contextmanager
+    def timer(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.timers[phase] = self.timers.get(phase, 0.0) + elapsed
+
+    #######################################################
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.start
+
+    #######################################################
+    def summary(self):
+        """One line, e.g. "Export: 120 objects scanned, ... in 0.012s (pack 0.004s)"."""
+        parts = []
+        for counter, value in self.counters.items():
+            if counter == "bytes written":
+                parts.append(f"{_format_bytes(value)} written")
+            else:
+                parts.append(f"{value} {counter}")
+
+        text = f"{self.name}: {', '.join(parts) or 'nothing done'} in {self.elapsed:.3f}s"
+        if self.timers:
+            phases = ", ".join(f"{phase} {seconds:.3f}s"
+                               for phase, seconds in self.timers.items())
+            text += f" ({phases})"
+        return text
+
+# Stats of the running or most recent session
+stats = Stats("2DFX")
+
+#######################################################
+def session(name):
+    """Start collecting a fresh set of stats and return it."""
+    global stats
+    stats = Stats(name)
+    return stats
+
+#######################################################
+def count(counter, amount=1):
+    stats.count(counter, amount)
+
+#######################################################
+def timer(phase):
+    return stats.timer(phase)
+
+#######################################################
+def summary():
+    """Log the summary of the current session at INFO and return it."""
+    text = stats.summary()
+    log.info(text)
+    return text
@@ -1,633 +1,2216 @@
-import bpy
-import struct
-import math
-import mathutils
-from bpy.props import StringProperty, FloatProperty, IntProperty, FloatVectorProperty, BoolProperty
-from bpy.types import Operator, Panel, PropertyGroup
-
-#Information taken from https://gtamods.com/wiki/2DFX
-# & https://gtamods.com/wiki/2d_Effect_(RW_Section)
-
-
-# Global variables
-fx_images = ["coronastar", "shad_exp"]
-fx_psystems = ["prt_blood", "prt_boatsplash"]
-effectfile = ""
-textfile = "" 
-
-def import_light(entry, collection):
-    light_data = bpy.data.lights.new(name="Omni_Light", type='POINT')
-    light_object = bpy.data.objects.new(name=f"Omni_Light", object_data=light_data)
-    collection.objects.link(light_object)
-
-    # Assign light properties
-    light_data.color = (
-        entry.color[0] / 255,
-        entry.color[1] / 255,
-        entry.color[2] / 255,
-    )
-    light_object.location = entry.loc
-
-    # Add custom properties
-
-    light_object.location = entry.loc
-    light_object["sdfx_drawdis"] = entry.corona_far_clip
-    light_object["sdfx_outerrange"] = entry.pointlightRange
-    light_object["sdfx_size"] = entry.coronaSize
-    light_object["sdfx_innerrange"] = entry.shadowSize
-    light_object["sdfx_corona"] = entry.coronaTexName
-    light_object["sdfx_shad"] = entry.shadowTexName
-    light_object["sdfx_OnAllDay"] = entry.coronaEnableReflection != 0
-    light_object["sdfx_showmode"] = entry.coronaShowMode
-    light_object["sdfx_reflection"] = entry.coronaEnableReflection != 0
-    light_object["sdfx_flaretype"] = entry.coronaFlareType
-    light_object["sdfx_shadcolormp"] = entry.shadowColorMultiplier
-    light_object["sdfx_shadowzdist"] = entry.shadowZDistance
-    light_object["sdfx_viewvector"] = entry.lookDirection or (0, 0, 0)
-
-    return light_object
-
-
-class SAEEFFECTS_OT_CreateLightsFromEntries(Operator):
-    """Create lights in Blender from the parsed 2DFX entries."""
-    bl_idname = "saeeffects.create_lights_from_entries"
-    bl_label = "Create Lights from Entries"
-
-    def execute(self, context):
-        global entries
-
-        if not entries:  # Check if entries exist
-            self.report({'ERROR'}, "No 2DFX entries available. Import first!")
-            return {'CANCELLED'}
-
-        # Create lights for each entry
-        collection = context.scene.collection
-        for entry in entries:
-
-            light_data = bpy.data.lights.new(name="2DFX_Light", type='POINT')
-            light_object = bpy.data.objects.new(name="2DFX_Light", object_data=light_data)
-            collection.objects.link(light_object)
-
-
-            sdfx_color = (
-                entry.color[0],  # RGB values in range 0-255
-                entry.color[1],
-                entry.color[2],
-                entry.color[3],  # Alpha value
-            )
-            light_object["sdfx_color"] = sdfx_color 
-
-
-            normalized_color = (
-                sdfx_color[0] / 255,
-                sdfx_color[1] / 255,
-                sdfx_color[2] / 255,
-            )
-            light_data.color = normalized_color
-
-            # Assign other light properties
-            light_object.location = entry.loc
-            light_object["sdfx_drawdis"] = entry.corona_far_clip
-            light_object["sdfx_outerrange"] = entry.pointlightRange
-            light_object["sdfx_size"] = entry.coronaSize
-            light_object["sdfx_innerrange"] = entry.shadowSize
-            light_object["sdfx_corona"] = entry.coronaTexName
-            light_object["sdfx_shad"] = entry.shadowTexName
-            light_object["sdfx_OnAllDay"] = entry.coronaEnableReflection != 0
-            light_object["sdfx_showmode"] = entry.coronaShowMode
-            light_object["sdfx_reflection"] = entry.coronaEnableReflection != 0
-            light_object["sdfx_flaretype"] = entry.coronaFlareType
-            light_object["sdfx_shadcolormp"] = entry.shadowColorMultiplier
-            light_object["sdfx_shadowzdist"] = entry.shadowZDistance
-            light_object["sdfx_viewvector"] = entry.lookDirection or (0, 0, 0)
-
-        self.report({'INFO'}, f"Created {len(entries)} lights from entries.")
-        return {'FINISHED'}
-
-
-
-
-def add_light_info(frames, entries):
-    # Determine the collection to which objects will be linked
-    if isinstance(frames, bpy.types.Context):
-        collection = frames.scene.collection
-    elif isinstance(frames, bpy.types.Collection):
-        collection = frames
-    elif hasattr(frames, "objects"):  # Handles bpy.context.scene.objects or similar
-        collection = bpy.context.scene.collection
-    elif isinstance(frames, (list, tuple)) and all(isinstance(obj, bpy.types.Object) for obj in frames):
-        collection = bpy.context.scene.collection
-    else:
-        print(f"Warning: Unrecognized 'frames' type ({type(frames)}). Defaulting to scene collection.")
-        collection = bpy.context.scene.collection
-
-    # Process each light entry
-    for entry in entries:
-
-        light_data = bpy.data.lights.new(name="2DFX_Light", type='POINT')
-        light_object = bpy.data.objects.new(name="2DFX_Light", object_data=light_data)
-        collection.objects.link(light_object)
-
-
-        # Debugging information
-        print(f"Added Point Light: {light_object.name}")
-        print(f"  Position: {light_object.location}")
-        print(f"  Color: {light_data.color}")
-
-    for frame, entry in zip(frames, entries):
-        light_objects = [obj for obj in frame.objects if obj.type == 'LIGHT']
-        if not light_objects:
-            print(f"No light objects found in frame: {frame.name}")
-            continue
-
-        for obj in light_objects:
-            obj["sdfx_drawdis"] = getattr(entry, 'corona_far_clip', 100.0)
-            obj["sdfx_outerrange"] = getattr(entry, 'pointlight_range', 18.0)
-            obj["sdfx_size"] = getattr(entry, 'corona_size', 1.0)
-            obj["sdfx_innerrange"] = getattr(entry, 'shadow_size', 8.0)
-            obj["sdfx_corona"] = getattr(entry, 'corona_tex_name', "coronastar")
-            obj["sdfx_shad"] = getattr(entry, 'shadow_tex_name', "shad_exp")
-            obj["sdfx_lighttype"] = getattr(entry, 'flags1', 1)
-            obj["sdfx_color"] = getattr(entry, 'color', (15, 230, 0, 200))
-            obj["sdfx_OnAllDay"] = getattr(entry, 'corona_enable_reflection', 1)
-            obj["sdfx_showmode"] = getattr(entry, 'corona_show_mode', 4)
-            obj["sdfx_reflection"] = getattr(entry, 'corona_enable_reflection', 0)
-            obj["sdfx_flaretype"] = getattr(entry, 'corona_flare_type', 0)
-            obj["sdfx_shadcolormp"] = getattr(entry, 'shadow_color_multiplier', 40)
-            obj["sdfx_shadowzdist"] = getattr(entry, 'shadow_z_distance', 0)
-            obj["sdfx_flags2"] = getattr(entry, 'flags2', 0)
-            obj["sdfx_viewvector"] = getattr(entry, 'look_direction', (0, 156, 0))
-
-            print(f"Added 2DFX light info to {obj.name} in frame {frame.name}")
-
-def process_2dfx_lights(self, effects, context):
-    """
-    Process each 2DFX light entry and add it to Blender using add_light_info.
-
-    Args:
-        effects: Parsed 2DFX effects containing LightEntries.
-        context: Blender context.
-    """
-    for i, entry in enumerate(effects.entries):
-        if entry.effect_id == 0:  # Only process light entries (effect_id = 0)
-            print(f"Processing Light Entry {i + 1}/{len(effects.entries)}...")
-            add_light_info(context, entry)
-
-def import_2dfx(self, effects, context):
-    """
-    Import 2DFX effects into Blender.
-
-    Args:
-        effects: Parsed 2DFX effects containing entries.
-        context: Blender context.
-    """
-    print("Importing 2DFX effects...")
-    self.process_2dfx_lights(effects, context)
-
-
-def add_particle_info(context, obj=None):
-    if obj is None:
-        objs = context.selected_objects
-    else:
-        objs = [obj]
-    for obj in objs:
-        if obj.type == 'EMPTY':
-            obj["sdfx_psys"] = fx_psystems[0]  # Default particle system
-            print(f"Added GTA Particle system info to {obj.name}")
-
-def add_text_info(context, obj=None):
-    if obj is None:
-        objs = context.selected_objects
-    else:
-        objs = [obj]
-    for obj in objs:
-        if obj.type == 'MESH' and "Plane" in obj.name:
-            obj["sdfx_text1"] = ""
-            obj["sdfx_text2"] = ""
-            obj["sdfx_text3"] = ""
-            obj["sdfx_text4"] = ""
-            print(f"Added GTA 2D Text info to {obj.name}")
-
-def export_info(context):
-    global effectfile
-    global textfile
-    obj_to_exp = [obj for obj in context.selected_objects if any(key.startswith("sdfx_") for key in obj.keys()) or obj.type in ['LIGHT', 'EMPTY', 'MESH']]
-    
-    if not obj_to_exp:
-        print("No objects with relevant properties found for export.")
-        return
-
-    with open(effectfile, "wb") as effect_stream:
-        # Write header info for binary file
-        effect_stream.write(len(obj_to_exp).to_bytes(4, byteorder='little'))
-        print(f"Number of objects to export: {len(obj_to_exp)}")
-        
-        for i, obj in enumerate(obj_to_exp, start=1):
-            if obj.type == 'LIGHT':
-                export_light_info(effect_stream, None, obj)
-            elif obj.type == 'EMPTY':
-                export_particle_info(effect_stream, None, obj)
-            elif obj.type == 'MESH' and "Plane" in obj.name:
-                export_text_info(effect_stream, None, obj)
-
-def export_text(context):
-    global textfile
-    obj_to_exp = [obj for obj in context.selected_objects if any(key.startswith("sdfx_") for key in obj.keys()) or obj.type in ['LIGHT', 'EMPTY', 'MESH']]
-    
-    if not obj_to_exp:
-        print("No objects with relevant properties found for export.")
-        return
-
-    with open(textfile, "w") as text_stream:
-        # Write header info for text file
-        text_stream.write(f"NumEntries {len(obj_to_exp)}\n")
-        print(f"Number of objects to export: {len(obj_to_exp)}")
-        
-        for i, obj in enumerate(obj_to_exp, start=1):
-            print(f"Exporting object: {obj.name}, Type: {obj.type}")
-            text_stream.write(f"######################### {i} #########################\n")
-            if obj.type == 'LIGHT':
-                export_light_info(None, text_stream, obj)
-            elif obj.type == 'EMPTY':
-                export_particle_info(None, text_stream, obj)
-            elif obj.type == 'MESH' and "Plane" in obj.name:
-                export_text_info(None, text_stream, obj)
-
-def export_light_info(effect_stream, text_stream, obj):
-    pos = obj.location
-    color = obj.get("sdfx_color", (255, 255, 255, 255))
-    corona_far_clip = obj.get("sdfx_drawdis", 100.0)
-    pointlight_range = obj.get("sdfx_outerrange", 18.0)
-    corona_size = obj.get("sdfx_size", 1.0)
-    shadow_size = obj.get("sdfx_innerrange", 8.0)
-    corona_show_mode = obj.get("sdfx_showmode", 4)
-    corona_enable_reflection = obj.get("sdfx_reflection", 0)
-    corona_flare_type = obj.get("sdfx_flaretype", 0)
-    shadow_color_multiplier = obj.get("sdfx_shadcolormp", 40)
-    flags1 = obj.get("sdfx_OnAllDay", 1)
-    corona_tex_name = obj.get("sdfx_corona", "coronastar")
-    shadow_tex_name = obj.get("sdfx_shad", "shad_exp")
-    shadow_z_distance = obj.get("sdfx_shadowzdist", 0)
-    flags2 = obj.get("sdfx_flags2", 0)
-    view_vector = obj.get("sdfx_viewvector", (0, 156, 0))
-
-    print(f"Light Position: {pos}, Color: {color}")
-
-    if effect_stream:
-        effect_stream.write(bytearray(struct.pack("f", pos.x)))
-        effect_stream.write(bytearray(struct.pack("f", pos.y)))
-        effect_stream.write(bytearray(struct.pack("f", pos.z)))
-        effect_stream.write(bytearray(struct.pack("4B", int(color[0]), int(color[1]), int(color[2]), int(color[3]))))
-        effect_stream.write(bytearray(struct.pack("f", corona_far_clip)))
-        effect_stream.write(bytearray(struct.pack("f", pointlight_range)))
-        effect_stream.write(bytearray(struct.pack("f", corona_size)))
-        effect_stream.write(bytearray(struct.pack("f", shadow_size)))
-        effect_stream.write(bytearray(struct.pack("B", corona_show_mode)))
-        effect_stream.write(bytearray(struct.pack("B", corona_enable_reflection)))
-        effect_stream.write(bytearray(struct.pack("B", corona_flare_type)))
-        effect_stream.write(bytearray(struct.pack("B", shadow_color_multiplier)))
-        effect_stream.write(bytearray(struct.pack("B", flags1)))
-        effect_stream.write(bytearray(corona_tex_name.encode('utf-8')).ljust(24, b'\0'))
-        effect_stream.write(bytearray(shadow_tex_name.encode('utf-8')).ljust(24, b'\0'))
-        effect_stream.write(bytearray(struct.pack("B", shadow_z_distance)))
-        effect_stream.write(bytearray(struct.pack("B", flags2)))
-        effect_stream.write(bytearray(struct.pack("B", 0)))  # padding
-
-    if text_stream:
-        text_stream.write(f"2dfxType         LIGHT\n")
-        text_stream.write(f"Position         {pos.x} {pos.y} {pos.z}\n")
-        text_stream.write(f"Color            {int(color[0])} {int(color[1])} {int(color[2])} {int(color[3])}\n")
-        text_stream.write(f"CoronaFarClip    {corona_far_clip}\n")
-        text_stream.write(f"PointlightRange  {pointlight_range}\n")
-        text_stream.write(f"CoronaSize       {corona_size}\n")
-        text_stream.write(f"ShadowSize       {shadow_size}\n")
-        text_stream.write(f"CoronaShowMode   {corona_show_mode}\n")
-        text_stream.write(f"CoronaReflection {corona_enable_reflection}\n")
-        text_stream.write(f"CoronaFlareType  {corona_flare_type}\n")
-        text_stream.write(f"ShadowColorMP    {shadow_color_multiplier}\n")
-        text_stream.write(f"ShadowZDistance  {shadow_z_distance}\n")
-        text_stream.write(f"CoronaTexName    {corona_tex_name}\n")
-        text_stream.write(f"ShadowTexName    {shadow_tex_name}\n")
-        text_stream.write(f"Flags1           {flags1}\n")
-        text_stream.write(f"Flags2           {flags2}\n")
-        text_stream.write(f"ViewVector       {view_vector[0]} {view_vector[1]} {view_vector[2]}\n")
-
-def export_particle_info(effect_stream, text_stream, obj):
-    pos = obj.location
-    psys = obj.get("sdfx_psys", fx_psystems[0])
-    print(f"Particle Position: {pos}, Particle System: {psys}")
-
-    if effect_stream:
-        effect_stream.write(bytearray(struct.pack("f", pos.x)))
-        effect_stream.write(bytearray(struct.pack("f", pos.y)))
-        effect_stream.write(bytearray(struct.pack("f", pos.z)))
-        effect_stream.write(len(psys).to_bytes(4, byteorder='little'))
-        effect_stream.write(psys.encode('utf-8'))
-
-    if text_stream:
-        text_stream.write(f"2dfxType         PARTICLE\n")
-        text_stream.write(f"Position         {pos.x} {pos.y} {pos.z}\n")
-        text_stream.write(f"ParticleSystem   {psys}\n")
-
-def export_text_info(effect_stream, text_stream, obj):
-    pos = obj.location
-    text_data = (obj.get("sdfx_text1", "") +
-                 obj.get("sdfx_text2", "") +
-                 obj.get("sdfx_text3", "") +
-                 obj.get("sdfx_text4", ""))
-    print(f"Text Position: {pos}, Text Data: {text_data}")
-
-    if effect_stream:
-        effect_stream.write(bytearray(struct.pack("f", pos.x)))
-        effect_stream.write(bytearray(struct.pack("f", pos.y)))
-        effect_stream.write(bytearray(struct.pack("f", pos.z)))
-        effect_stream.write(len(text_data).to_bytes(4, byteorder='little'))
-        effect_stream.write(text_data.encode('utf-8'))
-
-    if text_stream:
-        text_stream.write(f"2dfxType         TEXT\n")
-        text_stream.write(f"Position         {pos.x} {pos.y} {pos.z}\n")
-        text_stream.write(f"TextData         {text_data}\n")
-
-def create_lights_from_omni_frames():
-    for obj in bpy.data.objects:
-        if "Omni" in obj.name:
-            print(f"Found frame named 'Omni': {obj.name}")
-            # Create a new light object
-            bpy.ops.object.light_add(type='POINT', location=obj.location)
-            light = bpy.context.object
-            light.name = obj.name + "_Light"
-            # Add the light info properties
-            add_light_info(bpy.context, light)
-            print(f"Created light for frame: {obj.name}, at location {obj.location}")
-
-def import_2dfx(filepath):
-    with open(filepath, 'r', encoding='latin-1') as file:
-        obj = None
-        for line in file:
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-
-            parts = line.split()
-            if parts[0] == "2dfxType":
-                obj = bpy.data.objects.new("Imported_Object", None)
-                bpy.context.collection.objects.link(obj)
-                if parts[1] == "LIGHT":
-                    bpy.ops.object.light_add(type='POINT', location=(0, 0, 0))
-                    light = bpy.context.object
-                    light.name = f"Imported_Light_{len(bpy.data.objects)}"
-                    obj = light
-                add_light_info(bpy.context, obj)
-            if obj and parts[0] == "Position":
-                obj.location = (float(parts[1]), float(parts[2]), float(parts[3]))
-            elif obj and parts[0] == "Color":
-                obj["sdfx_color"] = (int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4]))
-            elif obj and parts[0] == "CoronaFarClip":
-                obj["sdfx_drawdis"] = float(parts[1])
-            elif obj and parts[0] == "PointlightRange":
-                obj["sdfx_outerrange"] = float(parts[1])
-            elif obj and parts[0] == "CoronaSize":
-                obj["sdfx_size"] = float(parts[1])
-            elif obj and parts[0] == "ShadowSize":
-                obj["sdfx_innerrange"] = float(parts[1])
-            elif obj and parts[0] == "CoronaShowMode":
-                obj["sdfx_showmode"] = int(parts[1])
-            elif obj and parts[0] == "CoronaReflection":
-                obj["sdfx_reflection"] = int(parts[1])
-            elif obj and parts[0] == "CoronaFlareType":
-                obj["sdfx_flaretype"] = int(parts[1])
-            elif obj and parts[0] == "ShadowColorMP":
-                obj["sdfx_shadcolormp"] = int(parts[1])
-            elif obj and parts[0] == "ShadowZDistance":
-                obj["sdfx_shadowzdist"] = int(parts[1])
-            elif obj and parts[0] == "CoronaTexName":
-                obj["sdfx_corona"] = parts[1]
-            elif obj and parts[0] == "ShadowTexName":
-                obj["sdfx_shad"] = parts[1]
-            elif obj and parts[0] == "Flags1":
-                obj["sdfx_OnAllDay"] = int(parts[1])
-            elif obj and parts[0] == "Flags2":
-                obj["sdfx_flags2"] = int(parts[1])
-            elif obj and parts[0] == "ViewVector":
-                obj["sdfx_viewvector"] = (float(parts[1]), float(parts[2]), float(parts[3]))
-
-class SAEFFECTS_OT_Import2dfx(Operator):
-    bl_idname = "saeffects.import_2dfx"
-    bl_label = "Import 2DFX File"
-    
-    filename_ext = ".2dfx"
-    filter_glob: StringProperty(default="*.2dfx", options={'HIDDEN'})
-    filepath: StringProperty(subtype="FILE_PATH")
-
-    def execute(self, context):
-        import_2dfx(self.filepath)
-        return {'FINISHED'}
-
-    def invoke(self, context, event):
-        context.window_manager.fileselect_add(self)
-        return {'RUNNING_MODAL'}
-
-#######################################################
-
-class DFF2dfxPanel(Panel):
-    bl_label = "DemonFF - 2DFX"
-    bl_idname = "PT_DFF2DFX"
-    bl_space_type = "PROPERTIES"
-    bl_region_type = "WINDOW"
-    bl_context = "object"
-
-    def draw(self, context):
-        layout = self.layout
-
-        box = layout.box()
-        row = box.row()
-        row.operator("saeffects.add_light_info", text="Add Light Info")
-        row = box.row()
-        row.operator("saeffects.add_particle_info", text="Add Particle Info")
-        row = box.row()
-        row.operator("saeffects.add_text_info", text="Add 2D Text Info")
-        row = box.row()
-        row.prop(context.scene, "saeffects_export_path")
-        row = box.row()
-        row.prop(context.scene, "saeffects_text_export_path")
-        row = box.row()
-        row.operator("saeffects.export_info", text="Export Binary Info")
-        row = box.row()
-        row.operator("saeffects.export_text_info", text="Export Text Info")
-        row = box.row()
-        row.operator("saeffects.create_lights_from_omni", text="Create Lights from Omni Frames")
-        row = box.row()
-        row.operator("saeffects.view_light_info", text="View Light Info")
-        row = box.row()
-        row.operator("saeffects.import_2dfx", text="Import 2DFX File")
-
-#######################################################
-
-class SAEFFECTS_OT_AddLightInfo(Operator):
-    bl_idname = "saeffects.add_light_info"
-    bl_label = "Add Light Info"
-    
-
-    def execute(self, context):
-
-        frames = context.scene.collection.children 
-        add_light_info(frames, entries)
-        return {'FINISHED'}
-
-class SAEFFECTS_OT_AddParticleInfo(Operator):
-    bl_idname = "saeffects.add_particle_info"
-    bl_label = "Add Particle Info"
-    
-    def execute(self, context):
-        add_particle_info(context)
-        return {'FINISHED'}
-
-class SAEFFECTS_OT_AddTextInfo(Operator):
-    bl_idname = "saeffects.add_text_info"
-    bl_label = "Add 2D Text Info"
-    
-    def execute(self, context):
-        add_text_info(context)
-        return {'FINISHED'}
-
-class SAEFFECTS_OT_ExportInfo(Operator):
-    bl_idname = "saeffects.export_info"
-    bl_label = "Export Binary Info"
-    
-    def execute(self, context):
-        global effectfile
-        effectfile = bpy.path.abspath(context.scene.saeffects_export_path)
-        export_info(context)
-        return {'FINISHED'}
-
-class SAEFFECTS_OT_ExportTextInfo(Operator):
-    bl_idname = "saeffects.export_text_info"
-    bl_label = "Export Text Info"
-    
-    filepath: StringProperty(subtype="FILE_PATH")
-
-    def invoke(self, context, event):
-        context.window_manager.fileselect_add(self)
-        return {'RUNNING_MODAL'}
-
-    def execute(self, context):
-        global textfile
-        textfile = self.filepath
-        export_text(context)
-        return {'FINISHED'}
-
-class SAEFFECTS_OT_CreateLightsFromOmni(Operator):
-    bl_idname = "saeffects.create_lights_from_omni"
-    bl_label = "Create Lights from Omni Frames"
-    
-    def execute(self, context):
-        create_lights_from_omni_frames()
-        return {'FINISHED'}
-
-class SAEFFECTS_OT_ViewLightInfo(Operator):
-    bl_idname = "saeffects.view_light_info"
-    bl_label = "View Light Info"
-
-    def execute(self, context):
-        for obj in context.selected_objects:
-            if obj.type == 'LIGHT':
-                context.view_layer.objects.active = obj
-                bpy.ops.wm.properties_add(data_path='object')
-        return {'FINISHED'}
-
-class OBJECT_PT_SDFXLightInfoPanel(Panel):
-    bl_label = "SDFX Light Info"
-    bl_idname = "OBJECT_PT_sdfx_light_info"
-    bl_space_type = 'PROPERTIES'
-    bl_region_type = 'WINDOW'
-    bl_context = "object"
-    
-    @classmethod
-    def poll(cls, context):
-        return context.object and context.object.type == 'LIGHT' and "sdfx_drawdis" in context.object
-    
-    def draw(self, context):
-        layout = self.layout
-        obj = context.object
-        
-        # Draw custom properties
-        layout.prop(obj, '["sdfx_drawdis"]', text="Draw Distance")
-        layout.prop(obj, '["sdfx_outerrange"]', text="Outer Range")
-        layout.prop(obj, '["sdfx_size"]', text="Size")
-        layout.prop(obj, '["sdfx_innerrange"]', text="Inner Range")
-        layout.prop(obj, '["sdfx_corona"]', text="Corona")
-        layout.prop(obj, '["sdfx_shad"]', text="Shadow")
-        
-        layout.prop(obj, '["sdfx_OnAllDay"]', text="On All Day")
-        layout.prop(obj, '["sdfx_showmode"]', text="Show Mode")
-        layout.prop(obj, '["sdfx_reflection"]', text="Reflection")
-        layout.prop(obj, '["sdfx_flaretype"]', text="Flare Type")
-        layout.prop(obj, '["sdfx_shadcolormp"]', text="Shadow Color Multiplier")
-        layout.prop(obj, '["sdfx_shadowzdist"]', text="Shadow Z Distance")
-        layout.prop(obj, '["sdfx_viewvector"]', text="View Vector")
-
-    def set_light_color(obj, color):
-        """
-        Safely set the color of a Blender light object.
-        
-        Args:
-            obj: The Blender light object.
-            color: A tuple (R, G, B) where values are between 0 and 255.
-        """
-        if obj and obj.type == 'LIGHT':
-            # Ensure color is normalized
-            normalized_color = (
-                color[0] / 255,  # Normalize R
-                color[1] / 255,  # Normalize G
-                color[2] / 255,  # Normalize B
-            )
-            obj.data.color = normalized_color
-
-
-#######################################################
-
-def register():
-    bpy.utils.register_class(DFF2dfxPanel)
-    bpy.utils.register_class(SAEFFECTS_OT_AddLightInfo)
-    bpy.utils.register_class(SAEFFECTS_OT_AddParticleInfo)
-    bpy.utils.register_class(SAEFFECTS_OT_AddTextInfo)
-    bpy.utils.register_class(SAEFFECTS_OT_ExportInfo)
-    bpy.utils.register_class(SAEFFECTS_OT_ExportTextInfo)
-    bpy.utils.register_class(SAEFFECTS_OT_CreateLightsFromOmni)
-    bpy.utils.register_class(SAEFFECTS_OT_ViewLightInfo)
-    bpy.utils.register_class(SAEFFECTS_OT_Import2dfx)
-    bpy.utils.register_class(SAEEFFECTS_OT_CreateLightsFromEntries)
-    bpy.utils.register_class(OBJECT_PT_SDFXLightInfoPanel)
-    bpy.types.Scene.saeffects_export_path = StringProperty(
-        name="Export Path",
-        description="Path to export the effects binary file",
-        subtype='FILE_PATH'
-    )
-    bpy.types.Scene.saeffects_text_export_path = StringProperty(
-        name="Text Export Path",
-        description="Path to export the effects text file",
-        subtype='FILE_PATH'
-    )
-
-#######################################################
-
-def unregister():
-    bpy.utils.unregister_class(DFF2dfxPanel)
-    bpy.utils.unregister_class(SAEFFECTS_OT_AddLightInfo)
-    bpy.utils.unregister_class(SAEFFECTS_OT_AddParticleInfo)
-    bpy.utils.unregister_class(SAEFFECTS_OT_AddTextInfo)
-    bpy.utils.unregister_class(SAEFFECTS_OT_ExportInfo)
-    bpy.utils.unregister_class(SAEFFECTS_OT_ExportTextInfo)
-    bpy.utils.unregister_class(SAEFFECTS_OT_CreateLightsFromOmni)
-    bpy.utils.unregister_class(SAEFFECTS_OT_ViewLightInfo)
-    bpy.utils.unregister_class(SAEFFECTS_OT_Import2dfx)
-    bpy.utils.unregister_class(SAEEFFECTS_OT_CreateLightsFromEntries)
-    bpy.utils.unregister_class(OBJECT_PT_SDFXLightInfoPanel)
-    del bpy.types.Scene.saeffects_export_path
-    del bpy.types.Scene.saeffects_text_export_path
-
-#######################################################
-
-if __name__ == "__main__":
-    register()
+import bpy
+import os
+import math
+import time
+import fnmatch
+import mathutils
+import numpy
+from bpy.props import StringProperty, FloatProperty, IntProperty, FloatVectorProperty, BoolProperty, IntVectorProperty
+from bpy.types import Operator, Panel, PropertyGroup
+from bpy.app.handlers import persistent
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from . import tdfx_codec, tdfx_log, tdfx_spatial
+from .tdfx_table import EffectTable, INT_RANGES, split_text_lines
+
+#Information taken from https://gtamods.com/wiki/2DFX
+# & https://gtamods.com/wiki/2d_Effect_(RW_Section)
+
+
+# Global variables
+fx_images = ["coronastar", "shad_exp"]
+fx_psystems = ["prt_blood", "prt_boatsplash"]
+effectfile = ""
+textfile = "" 
+
+# Light entries of the last imported DFF
+entries = EffectTable()
+
+# (record count, packed binary records) of each object from the last
+# export, keyed by the object's full name. Entries are dropped whenever the
+# object changes.
+_record_cache = {}
+
+#######################################################
+# 2DFX settings live on each object (Object.sdfx), so they follow it through
+# duplicate, copy/paste and append. The scene-level registry mirrors them,
+# one entry per 2DFX object, so exporters and panels can enumerate effects
+# and read or write whole columns with foreach_get/foreach_set. Both sides
+# are kept in sync by the update callbacks and the bulk writers below.
+
+effect_types = (
+    ('LIGHT', "Light", "2DFX light"),
+    ('PARTICLE', "Particle", "2DFX particle system"),
+    ('TEXT', "Text", "2DFX 2D text"),
+    ('CLOUD', "Light Cloud", "2DFX lights stored as the points of a mesh"),
+)
+
+# Nesting depth of writes that already update both sides
+_syncing = [0]
+
+@contextmanager
+def _settings_sync():
+    _syncing[0] += 1
+    try:
+        yield
+    finally:
+        _syncing[0] -= 1
+
+def _settings_update(self, context):
+    if _syncing[0]:
+        return
+
+    if isinstance(self.id_data, bpy.types.Object):
+        # Edited on the object, mirror into the registry of every scene
+        obj = self.id_data
+        for scene in obj.users_scene:
+            entry = effect_entry(obj, scene)
+            if entry is not None:
+                _copy_settings(self, entry)
+    else:
+        obj = self.object
+        if obj is None:
+            return
+        _copy_settings(self, obj.sdfx)
+
+    mark_dirty(obj)
+
+_light_defaults = tdfx_codec.LIGHT_DEFAULTS
+
+# Typed 2DFX fields shared by Object.sdfx and the registry entries
+class _SDFXSettings:
+    # Light
+    color: IntVectorProperty(
+        name="Color", size=4, min=0, max=255,
+        default=_light_defaults["color"], update=_settings_update)
+    corona_far_clip: FloatProperty(
+        name="Draw Distance",
+        default=_light_defaults["corona_far_clip"], update=_settings_update)
+    pointlight_range: FloatProperty(
+        name="Outer Range",
+        default=_light_defaults["pointlight_range"], update=_settings_update)
+    corona_size: FloatProperty(
+        name="Size",
+        default=_light_defaults["corona_size"], update=_settings_update)
+    shadow_size: FloatProperty(
+        name="Inner Range",
+        default=_light_defaults["shadow_size"], update=_settings_update)
+    corona_show_mode: IntProperty(
+        name="Show Mode", min=0, max=255,
+        default=_light_defaults["corona_show_mode"], update=_settings_update)
+    corona_enable_reflection: IntProperty(
+        name="Reflection", min=0, max=255,
+        default=_light_defaults["corona_enable_reflection"], update=_settings_update)
+    corona_flare_type: IntProperty(
+        name="Flare Type", min=0, max=255,
+        default=_light_defaults["corona_flare_type"], update=_settings_update)
+    shadow_color_multiplier: IntProperty(
+        name="Shadow Color Multiplier", min=0, max=255,
+        default=_light_defaults["shadow_color_multiplier"], update=_settings_update)
+    flags1: IntProperty(
+        name="Flags 1", min=0, max=255,
+        default=_light_defaults["flags1"], update=_settings_update)
+    corona_tex_name: StringProperty(
+        name="Corona",
+        default=_light_defaults["corona_tex_name"], update=_settings_update)
+    shadow_tex_name: StringProperty(
+        name="Shadow",
+        default=_light_defaults["shadow_tex_name"], update=_settings_update)
+    shadow_z_distance: IntProperty(
+        name="Shadow Z Distance", min=0, max=255,
+        default=_light_defaults["shadow_z_distance"], update=_settings_update)
+    flags2: IntProperty(
+        name="Flags 2", min=0, max=255,
+        default=_light_defaults["flags2"], update=_settings_update)
+    view_vector: IntVectorProperty(
+        name="View Vector", size=3, min=-128, max=255,
+        default=_light_defaults["view_vector"], update=_settings_update)
+
+    # Particle
+    psys: StringProperty(
+        name="Particle System",
+        default=tdfx_codec.PARTICLE_DEFAULTS["psys"], update=_settings_update)
+
+    # Text, four lines of 16 characters
+    text1: StringProperty(name="Line 1", update=_settings_update)
+    text2: StringProperty(name="Line 2", update=_settings_update)
+    text3: StringProperty(name="Line 3", update=_settings_update)
+    text4: StringProperty(name="Line 4", update=_settings_update)
+    size: FloatVectorProperty(
+        name="Size", size=2,
+        default=tdfx_codec.TEXT_DEFAULTS["size"], update=_settings_update)
+    rotation: FloatVectorProperty(
+        name="Rotation", size=3,
+        default=tdfx_codec.TEXT_DEFAULTS["rotation"], update=_settings_update)
+    flags: IntProperty(
+        name="Flags", min=0, max=65535,
+        default=tdfx_codec.TEXT_DEFAULTS["flags"], update=_settings_update)
+
+class SDFXEffectSettings(_SDFXSettings, PropertyGroup):
+    """2DFX settings of an object, registered as Object.sdfx."""
+    effect_type: bpy.props.EnumProperty(
+        items=(('NONE', "None", "Not a 2DFX object"),) + effect_types, default='NONE')
+
+class SDFXEffectEntry(_SDFXSettings, PropertyGroup):
+    """Registry entry mirroring the settings of one 2DFX object."""
+    object: bpy.props.PointerProperty(type=bpy.types.Object)
+    effect_type: bpy.props.EnumProperty(items=effect_types)
+
+# Numeric registry fields accessed in bulk: (name, dtype, components)
+effect_columns = (
+    ("color", numpy.int32, 4),
+    ("corona_far_clip", numpy.float32, 1),
+    ("pointlight_range", numpy.float32, 1),
+    ("corona_size", numpy.float32, 1),
+    ("shadow_size", numpy.float32, 1),
+    ("corona_show_mode", numpy.int32, 1),
+    ("corona_enable_reflection", numpy.int32, 1),
+    ("corona_flare_type", numpy.int32, 1),
+    ("shadow_color_multiplier", numpy.int32, 1),
+    ("flags1", numpy.int32, 1),
+    ("shadow_z_distance", numpy.int32, 1),
+    ("flags2", numpy.int32, 1),
+    ("view_vector", numpy.int32, 3),
+    ("size", numpy.float32, 2),
+    ("rotation", numpy.float32, 3),
+    ("flags", numpy.int32, 1),
+)
+
+# String registry fields, which foreach_get cannot read
+effect_string_fields = (
+    "corona_tex_name", "shadow_tex_name", "psys",
+    "text1", "text2", "text3", "text4",
+)
+
+_text_lines = ("text1", "text2", "text3", "text4")
+
+# Numeric fields of text effects, read from roadsign section entries
+_roadsign_fields = ("size", "rotation", "flags")
+
+def _join_text_lines(lines):
+    """Join the four text lines into text_data, each padded to 16 characters."""
+    return "".join(str(line).ljust(16)[:16] for line in lines).rstrip()
+
+# Fields shared by the object settings and the registry entries
+_settings_fields = [name for name, _, _ in effect_columns] + list(effect_string_fields)
+_vector_fields = {name for name, _, size in effect_columns if size > 1}
+
+def _copy_settings(source, target, fields=None):
+    """Copy 2DFX settings between an object's sdfx and its registry entry."""
+    with _settings_sync():
+        for name in fields or _settings_fields:
+            value = getattr(source, name)
+            setattr(target, name, value[:] if name in _vector_fields else value)
+
+def object_effect_type(obj):
+    if obj.type == 'LIGHT':
+        return 'LIGHT'
+    elif obj.type == 'EMPTY':
+        return 'PARTICLE'
+    elif obj.type == 'MESH' and obj.get("tdfx_light_cloud"):
+        return 'CLOUD'
+    elif obj.type == 'MESH' and "Plane" in obj.name:
+        return 'TEXT'
+    return None
+
+# Scene name -> [registry length, {object: registry index}]. Rebuilt when the
+# length no longer matches, e.g. after the registry was edited elsewhere.
+_registry_sets = {}
+
+def _registered_objects(scene):
+    registry = scene.sdfx_effects
+    cached = _registry_sets.get(scene.name_full)
+    if cached is None or cached[0] != len(registry):
+        cached = [len(registry),
+                  {entry.object: i for i, entry in enumerate(registry)}]
+        _registry_sets[scene.name_full] = cached
+    return cached
+
+def effect_entry(obj, scene=None):
+    """Return the registry entry holding an object's 2DFX settings, or None."""
+    if scene is None:
+        scene = bpy.context.scene
+
+    index = _registered_objects(scene)[1].get(obj)
+    if index is None:
+        return None
+
+    entry = scene.sdfx_effects[index]
+    if entry.object != obj:
+        # Registry was reordered behind our back
+        _registry_sets.pop(scene.name_full, None)
+        index = _registered_objects(scene)[1].get(obj)
+        return None if index is None else scene.sdfx_effects[index]
+    return entry
+
+def _effects_to_columns(effects):
+    """Turn effect dicts into registry columns, filling in defaults."""
+    columns = {}
+    for name, _, _ in effect_columns:
+        default = tdfx_codec.DEFAULTS[name]
+        columns[name] = [effect.get(name, default) for effect in effects]
+
+    for name in ("corona_tex_name", "shadow_tex_name"):
+        default = _light_defaults[name]
+        columns[name] = [effect.get(name, default) for effect in effects]
+
+    default = tdfx_codec.PARTICLE_DEFAULTS["psys"]
+    columns["psys"] = [effect.get("psys", default) for effect in effects]
+
+    lines = split_text_lines([effect.get("text_data", "") for effect in effects])
+    for name, texts in zip(_text_lines, lines):
+        columns[name] = texts
+
+    return columns
+
+def _fill_entries(scene, start, count, columns):
+    """
+    Write columns into registry entries start..start+count in bulk.
+
+    Numeric columns go through foreach_get/foreach_set on the whole
+    registry. Strings are only assigned where they differ from the default.
+    The written entries are then copied onto their objects' settings.
+    """
+    registry = scene.sdfx_effects
+    total = len(registry)
+
+    for name, dtype, size in effect_columns:
+        if name not in columns:
+            continue
+        data = numpy.empty(total * size, dtype=dtype)
+        registry.foreach_get(name, data)
+        data[start * size:(start + count) * size] = \
+            numpy.asarray(columns[name], dtype=dtype).ravel()
+        registry.foreach_set(name, data)
+
+    for name in effect_string_fields:
+        if name not in columns:
+            continue
+        default = SDFXEffectEntry.bl_rna.properties[name].default
+        with _settings_sync():
+            for i, value in enumerate(columns[name]):
+                if isinstance(value, bytes):
+                    value = value.decode('utf-8', 'ignore')
+                if value != default:
+                    setattr(registry[start + i], name, value)
+
+    for entry in registry[start:start + count]:
+        if entry.object is not None:
+            _copy_settings(entry, entry.object.sdfx)
+            mark_dirty(entry.object)
+
+def _take_rows(column, rows):
+    if isinstance(column, numpy.ndarray):
+        return column[rows]
+    return [column[row] for row in rows]
+
+def register_effects(objects, scene=None, effects=None, columns=None):
+    """
+    Add objects to the scene's 2DFX registry, skipping known ones.
+
+    Objects that already carry 2DFX settings, e.g. duplicates or objects
+    appended from another file, keep them unless effects or columns are
+    given. Otherwise the settings are filled in on both the object and its
+    entry.
+
+    Args:
+        objects: Objects to register.
+        scene: Scene holding the registry, the active scene by default.
+        effects: Optional effect dicts, one per object, to fill the new
+            entries with.
+        columns: Optional registry columns, one row per object, used
+            instead of effects.
+
+    Raises:
+        tdfx_codec.TdfxImportException if a text in effects does not fit
+        the four text lines. The registry is left unchanged.
+    """
+    if scene is None:
+        scene = bpy.context.scene
+
+    # Converted before any entry is added, so effects that don't fit leave
+    # the registry as it was
+    if effects is not None:
+        columns = _effects_to_columns(effects)
+
+    registry = scene.sdfx_effects
+    cached = _registered_objects(scene)
+    known = cached[1]
+    start = len(registry)
+    rows = []
+
+    for row, obj in enumerate(objects):
+        settings = obj.sdfx
+        effect_type = settings.effect_type
+        if effect_type == 'NONE':
+            effect_type = object_effect_type(obj)
+        if effect_type is None or obj in known:
+            continue
+
+        entry = registry.add()
+        entry.object = obj
+        entry.effect_type = effect_type
+        if settings.effect_type == 'NONE':
+            settings.effect_type = effect_type
+        elif effects is None and columns is None:
+            _copy_settings(settings, entry)
+        known[obj] = cached[0]
+        cached[0] += 1
+        rows.append(row)
+
+    if columns is not None and len(rows) != len(objects):
+        columns = {name: _take_rows(column, rows)
+                   for name, column in columns.items()}
+
+    if columns is not None and rows:
+        _fill_entries(scene, start, len(rows), columns)
+
+def effect_objects(scene, selected_only=False):
+    """
+    Enumerate the scene's registered 2DFX objects in O(k).
+
+    Entries whose object was deleted or unlinked from every collection are
+    pruned on the way.
+    """
+    registry = scene.sdfx_effects
+    objects = []
+    stale = []
+
+    for i, entry in enumerate(registry):
+        obj = entry.object
+        if obj is None or not obj.users_collection:
+            stale.append(i)
+        elif not selected_only or obj.select_get():
+            objects.append(obj)
+
+    if stale:
+        for i in reversed(stale):
+            registry.remove(i)
+        _registry_sets.pop(scene.name_full, None)
+
+    return objects
+
+def read_effect_columns(scene, fields=None):
+    """
+    Read registry fields for all entries at once.
+
+    Returns:
+        Dict of field name -> NumPy array (numeric fields, one row per
+        entry) or list (string fields).
+    """
+    registry = scene.sdfx_effects
+    count = len(registry)
+    columns = {}
+
+    for name, dtype, size in effect_columns:
+        if fields is None or name in fields:
+            data = numpy.empty(count * size, dtype=dtype)
+            registry.foreach_get(name, data)
+            columns[name] = data.reshape(count, size) if size > 1 else data
+
+    for name in effect_string_fields:
+        if fields is None or name in fields:
+            columns[name] = [getattr(entry, name) for entry in registry]
+
+    return columns
+
+def sync_registry(scene):
+    """
+    Bring the scene's registry in line with the settings on its objects.
+
+    Stale entries are pruned, objects carrying 2DFX settings that are not
+    registered yet (duplicated, pasted or appended ones) are added, and
+    entries from files saved before the settings moved onto the objects
+    are copied onto them.
+
+    This walks every object of the scene, so it only runs on file load and
+    from the Rebuild 2DFX Registry operator. While editing, the depsgraph
+    handler registers new objects as they show up.
+
+    Returns:
+        Number of newly registered objects.
+    """
+    effect_objects(scene)
+
+    for entry in scene.sdfx_effects:
+        settings = entry.object.sdfx
+        if settings.effect_type == 'NONE':
+            _copy_settings(entry, settings)
+            settings.effect_type = entry.effect_type
+
+    known = _registered_objects(scene)[1]
+    missing = [obj for obj in scene.objects
+               if obj.sdfx.effect_type != 'NONE' and obj not in known]
+    register_effects(missing, scene)
+    return len(missing)
+
+#######################################################
+# Legacy sdfx_* custom properties
+
+# Effect field -> custom property that used to hold it on light objects
+sdfx_light_keys = (
+    ("color", "sdfx_color"),
+    ("corona_far_clip", "sdfx_drawdis"),
+    ("pointlight_range", "sdfx_outerrange"),
+    ("corona_size", "sdfx_size"),
+    ("shadow_size", "sdfx_innerrange"),
+    ("corona_show_mode", "sdfx_showmode"),
+    ("corona_enable_reflection", "sdfx_reflection"),
+    ("corona_flare_type", "sdfx_flaretype"),
+    ("shadow_color_multiplier", "sdfx_shadcolormp"),
+    ("flags1", "sdfx_OnAllDay"),
+    ("corona_tex_name", "sdfx_corona"),
+    ("shadow_tex_name", "sdfx_shad"),
+    ("shadow_z_distance", "sdfx_shadowzdist"),
+    ("flags2", "sdfx_flags2"),
+    ("view_vector", "sdfx_viewvector"),
+)
+
+def _legacy_effect(obj):
+    effect = {}
+    for field, key in sdfx_light_keys:
+        if key in obj:
+            value = obj[key]
+            effect[field] = tuple(value) if hasattr(value, "to_list") else value
+    if "sdfx_psys" in obj:
+        effect["psys"] = obj["sdfx_psys"]
+    effect["text_data"] = _join_text_lines(obj.get(f"sdfx_{name}", "") for name in _text_lines)
+    return effect
+
+def migrate_custom_properties(scene):
+    """
+    Migrate sdfx_* custom properties into object settings and the registry.
+
+    The registry is synced first, and only objects without 2DFX settings
+    are migrated, so this is safe to run on every file load. The custom
+    properties are kept, older versions of the add-on still read them.
+
+    Returns:
+        Number of migrated objects.
+    """
+    sync_registry(scene)
+
+    legacy = [obj for obj in scene.objects
+              if obj.sdfx.effect_type == 'NONE' and
+              object_effect_type(obj) is not None and
+              any(key.startswith("sdfx_") for key in obj.keys())]
+
+    register_effects(legacy, scene, effects=[_legacy_effect(obj) for obj in legacy])
+    return len(legacy)
+
+def _new_light_data(color, pointlight_range, name="2DFX_Light"):
+    light_data = bpy.data.lights.new(name=name, type='POINT')
+    light_data.color = (color[0] / 255, color[1] / 255, color[2] / 255)
+    light_data.use_custom_distance = True
+    light_data.cutoff_distance = pointlight_range
+    return light_data
+
+class LightDataCache:
+    """
+    Hands out one shared light datablock per distinct color and outer range.
+
+    Only the fields stored on the bpy.types.Light take part in the key. All
+    other 2DFX parameters stay on the objects, so sharing is lossless.
+    """
+
+    def __init__(self):
+        self.lights = {}
+
+    def get(self, color, pointlight_range, name="2DFX_Light"):
+        key = (int(color[0]), int(color[1]), int(color[2]), float(pointlight_range))
+
+        light_data = self.lights.get(key)
+        if light_data is None:
+            light_data = _new_light_data(color, pointlight_range, name)
+            self.lights[key] = light_data
+        return light_data
+
+def _new_light_object(color, pointlight_range=18.0, light_cache=None, name="2DFX_Light"):
+    if light_cache is not None:
+        light_data = light_cache.get(color, pointlight_range, name)
+    else:
+        light_data = _new_light_data(color, pointlight_range, name)
+    return bpy.data.objects.new(name=name, object_data=light_data)
+
+def import_light(entry, collection, light_cache=None):
+    light_object = _new_light_object(entry.color, entry.pointlightRange, light_cache,
+                                     name="Omni_Light")
+    collection.objects.link(light_object)
+
+    light_object.location = entry.loc
+    register_effects([light_object], effects=[entry_effect(entry)])
+
+    return light_object
+
+
+class SAEEFFECTS_OT_CreateLightsFromEntries(Operator):
+    """Create lights in Blender from the parsed 2DFX entries."""
+    bl_idname = "saeeffects.create_lights_from_entries"
+    bl_label = "Create Lights from Entries"
+
+    share_light_data: BoolProperty(
+        name="Share Light Data",
+        description="Lights with the same color and outer range share one light datablock",
+        default=False
+    )
+
+    def execute(self, context):
+        global entries
+
+        if not entries:  # Check if entries exist
+            self.report({'ERROR'}, "No 2DFX entries available. Import first!")
+            return {'CANCELLED'}
+
+        # Create lights for each entry
+        table = entries
+        if not isinstance(table, EffectTable):
+            table = EffectTable.from_effects([entry_effect(entry) for entry in entries])
+        create_effect_objects(table, context.scene.collection,
+                              self.share_light_data, context.scene)
+
+        self.report({'INFO'}, f"Created {len(entries)} lights from entries.")
+        return {'FINISHED'}
+
+def _frame_objects(frames):
+    """Flatten the accepted 'frames' arguments into candidate owner objects."""
+    if isinstance(frames, bpy.types.Context):
+        objects = list(frames.scene.objects)
+    elif isinstance(frames, bpy.types.Collection):
+        objects = list(frames.all_objects)
+    else:
+        objects = []
+        for frame in frames:
+            if isinstance(frame, bpy.types.Collection):
+                objects.extend(frame.all_objects)
+            elif isinstance(frame, bpy.types.Object):
+                objects.append(frame)
+
+    # Lights and the registered 2DFX objects are never frames
+    return [obj for obj in objects
+            if obj.type != 'LIGHT' and obj.sdfx.effect_type == 'NONE'
+            and not is_light_cloud(obj) and not is_cloud_display(obj)]
+
+def add_light_info(frames, entries, tolerance=tdfx_spatial.FRAME_TOLERANCE,
+                   light_cache=None):
+    """
+    Create a light for each 2DFX entry and parent it to its owning frame.
+
+    Entries are matched to the nearest frame within tolerance through a
+    KD-tree, instead of being paired with frames by list position.
+
+    Args:
+        frames: Context, collection, or list of collections or objects
+            whose objects are candidate frames.
+        entries: Effect dicts or parsed 2DFX light entries.
+        tolerance: Maximum entry-to-frame distance, or None for no limit.
+        light_cache: Optional LightDataCache to share light datablocks.
+
+    Returns:
+        List of created light objects.
+    """
+    # Determine the collection to which objects will be linked
+    if isinstance(frames, bpy.types.Context):
+        collection = frames.scene.collection
+    elif isinstance(frames, bpy.types.Collection):
+        collection = frames
+    elif hasattr(frames, "objects"):  # Handles bpy.context.scene.objects or similar
+        collection = bpy.context.scene.collection
+    elif isinstance(frames, (list, tuple)) and all(isinstance(obj, bpy.types.Object) for obj in frames):
+        collection = bpy.context.scene.collection
+    else:
+        tdfx_log.warning("Unrecognized 'frames' type (%s). Defaulting to scene collection.",
+                         type(frames))
+        collection = bpy.context.scene.collection
+
+    effects = [entry_effect(entry) for entry in entries]
+    with tdfx_log.timer("associate"):
+        pairs = tdfx_spatial.associate(effects,
+                                       [effect["position"] for effect in effects],
+                                       _frame_objects(frames),
+                                       tolerance)
+
+    light_objects = []
+    with tdfx_log.timer("create"):
+        for effect, frame in pairs:
+            light_object = _light_object_from_effect(effect, light_cache)
+            light_object.location = effect["position"]
+
+            if frame is not None:
+                light_object.parent = frame
+                light_object.matrix_parent_inverse = frame.matrix_world.inverted()
+                tdfx_log.debug("Parented %s to %s", light_object.name, frame.name)
+
+            collection.objects.link(light_object)
+            light_objects.append(light_object)
+
+        register_effects(light_objects, effects=effects)
+
+    tdfx_log.count("lights created", len(light_objects))
+    tdfx_log.count("parented to frames", sum(1 for _, frame in pairs if frame is not None))
+    return light_objects
+
+def process_2dfx_lights(self, effects, context):
+    """
+    Process the 2DFX light entries and add them to Blender using add_light_info.
+
+    Args:
+        effects: Parsed 2DFX effects containing LightEntries.
+        context: Blender context.
+    """
+    # Only process light entries (effect_id = 0)
+    light_entries = [entry for entry in effects.entries if entry.effect_id == 0]
+    tdfx_log.debug("Processing %d/%d light entries", len(light_entries), len(effects.entries))
+    add_light_info(context, light_entries)
+
+def import_2dfx(self, effects, context):
+    """
+    Import 2DFX effects into Blender.
+
+    Args:
+        effects: Parsed 2DFX effects containing entries.
+        context: Blender context.
+    """
+    tdfx_log.debug("Importing 2DFX effects")
+    self.process_2dfx_lights(effects, context)
+
+
+def add_particle_info(context, obj=None):
+    if obj is None:
+        objs = context.selected_objects
+    else:
+        objs = [obj]
+    added = []
+    for obj in objs:
+        if obj.type == 'EMPTY':
+            added.append(obj)
+            tdfx_log.debug("Added GTA Particle system info to %s", obj.name)
+    register_effects(added, context.scene)
+
+def add_text_info(context, obj=None):
+    if obj is None:
+        objs = context.selected_objects
+    else:
+        objs = [obj]
+    added = []
+    for obj in objs:
+        if obj.type == 'MESH' and "Plane" in obj.name:
+            added.append(obj)
+            tdfx_log.debug("Added GTA 2D Text info to %s", obj.name)
+    register_effects(added, context.scene)
+
+# Effect field -> attribute names used by parsed 2DFX entry objects
+_entry_attributes = (
+    ("color", ("color",)),
+    ("corona_far_clip", ("corona_far_clip", "coronaFarClip")),
+    ("pointlight_range", ("pointlight_range", "pointlightRange")),
+    ("corona_size", ("corona_size", "coronaSize")),
+    ("shadow_size", ("shadow_size", "shadowSize")),
+    ("corona_show_mode", ("corona_show_mode", "coronaShowMode")),
+    ("corona_enable_reflection", ("corona_enable_reflection", "coronaEnableReflection")),
+    ("corona_flare_type", ("corona_flare_type", "coronaFlareType")),
+    ("shadow_color_multiplier", ("shadow_color_multiplier", "shadowColorMultiplier")),
+    ("flags1", ("flags1",)),
+    ("corona_tex_name", ("corona_tex_name", "coronaTexName")),
+    ("shadow_tex_name", ("shadow_tex_name", "shadowTexName")),
+    ("shadow_z_distance", ("shadow_z_distance", "shadowZDistance")),
+    ("flags2", ("flags2",)),
+    ("view_vector", ("look_direction", "lookDirection")),
+)
+
+def _entry_position(entry):
+    position = getattr(entry, "loc", None)
+    if position is None:
+        position = getattr(entry, "position", (0.0, 0.0, 0.0))
+    return tuple(position)
+
+def entry_effect(entry):
+    """Convert a parsed 2DFX light entry object into a light effect dict."""
+    if isinstance(entry, dict):
+        return entry
+
+    effect = {"type": "LIGHT", "position": _entry_position(entry)}
+    for field, names in _entry_attributes:
+        for name in names:
+            value = getattr(entry, name, None)
+            if value is not None:
+                effect[field] = value
+                break
+
+    return effect
+
+def _light_object_from_effect(effect, light_cache=None):
+    defaults = tdfx_codec.LIGHT_DEFAULTS
+    return _new_light_object(effect.get("color", defaults["color"]),
+                             effect.get("pointlight_range", defaults["pointlight_range"]),
+                             light_cache)
+
+# Scene name -> ((registry length, object count), SpatialIndex of its 2DFX
+# objects). Dropped when objects move, and on load and undo. The counts
+# catch objects registered or deleted since the index was built.
+_spatial_indexes = {}
+
+def effects_within_radius(scene, center, radius):
+    """
+    Find registered 2DFX objects near a point. The KD-tree is kept per
+    scene until an object moves or is registered or deleted.
+
+    Args:
+        scene: Scene whose effect registry is searched.
+        center: World space point.
+        radius: Search radius.
+
+    Returns:
+        List of (object, distance) pairs, nearest first.
+    """
+    key = (len(scene.sdfx_effects), len(bpy.data.objects))
+    cached = _spatial_indexes.get(scene.name_full)
+    if cached is None or cached[0] != key:
+        cached = (key, tdfx_spatial.SpatialIndex.from_objects(effect_objects(scene)))
+        _spatial_indexes[scene.name_full] = cached
+    return cached[1].within_radius(center, radius)
+
+_light_fields = list(tdfx_codec.LIGHT_DEFAULTS)
+
+def registry_effect(entry, obj=None):
+    """Build the effect dict of a registry entry."""
+    if obj is None:
+        obj = entry.object
+
+    effect_type = entry.effect_type
+    effect = {"type": effect_type, "position": tuple(obj.location)}
+
+    if effect_type == 'LIGHT':
+        fields = _light_fields
+    elif effect_type == 'PARTICLE':
+        fields = ("psys",)
+    elif effect_type == 'TEXT':
+        effect["text_data"] = _join_text_lines(getattr(entry, name) for name in _text_lines)
+        fields = _roadsign_fields
+    else:
+        fields = ()
+
+    for name in fields:
+        value = getattr(entry, name)
+        effect[name] = value if isinstance(value, (str, int, float)) else tuple(value)
+
+    return effect
+
+def _gather_effects(scene, selected_only=False, cached=None):
+    """
+    Gather the effects of the registered objects from bulk column reads.
+
+    Args:
+        cached: Optional dict keyed by object name, e.g. the record cache.
+            Objects found in it are not gathered.
+
+    Returns:
+        List of (object, effects) pairs, where effects is a one-item list
+        for regular objects, an EffectTable for light clouds and None for
+        objects found in cached.
+    """
+    objects = effect_objects(scene)
+    registry = scene.sdfx_effects
+    types = [entry.effect_type for entry in registry]
+
+    groups = []
+    rows = []
+    for i, obj in enumerate(objects):
+        if selected_only and not obj.select_get():
+            continue
+        if cached is not None and obj.name_full in cached:
+            groups.append((obj, None))
+            continue
+        rows.append(i)
+
+    if not rows:
+        return groups
+
+    columns = read_effect_columns(scene)
+    numeric = {name: columns[name].tolist() for name, _, _ in effect_columns}
+    for i in rows:
+        obj = objects[i]
+        if types[i] == 'CLOUD':
+            groups.append((obj, light_cloud_table(obj)))
+            continue
+
+        effect = {"type": types[i], "position": tuple(obj.location)}
+        if types[i] == 'LIGHT':
+            fields = _light_fields
+        elif types[i] == 'PARTICLE':
+            fields = ("psys",)
+        else:
+            effect["text_data"] = _join_text_lines(columns[name][i] for name in _text_lines)
+            fields = _roadsign_fields
+
+        for name in fields:
+            if name in numeric:
+                value = numeric[name][i]
+                effect[name] = tuple(value) if name in _vector_fields else value
+            else:
+                effect[name] = columns[name][i]
+        groups.append((obj, [effect]))
+
+    return groups
+
+def _flatten(groups):
+    effects = []
+    for _, group in groups:
+        if group is not None:
+            effects.extend(group)
+    return effects
+
+#######################################################
+# Point-cloud storage: all lights of a model as the vertices of a single
+# mesh, with one point attribute per light field. Tens of thousands of
+# coronas then cost one object instead of one object each.
+
+# Object property marking a mesh as a light cloud
+CLOUD_MARKER = "tdfx_light_cloud"
+
+# Object property marking the empty instanced on a cloud's points
+CLOUD_DISPLAY_MARKER = "tdfx_cloud_display"
+
+# Mesh property holding the cloud's texture names, separated by newlines
+CLOUD_STRINGS = "tdfx_strings"
+
+# Point attributes of a light cloud: (field, attribute type, dtype). Colors
+# are packed into a single int per point, view vectors are float vectors so
+# signed components survive, texture names are indices into CLOUD_STRINGS.
+cloud_attributes = (
+    ("color", 'INT', numpy.int32),
+    ("corona_far_clip", 'FLOAT', numpy.float32),
+    ("pointlight_range", 'FLOAT', numpy.float32),
+    ("corona_size", 'FLOAT', numpy.float32),
+    ("shadow_size", 'FLOAT', numpy.float32),
+    ("corona_show_mode", 'INT', numpy.int32),
+    ("corona_enable_reflection", 'INT', numpy.int32),
+    ("corona_flare_type", 'INT', numpy.int32),
+    ("shadow_color_multiplier", 'INT', numpy.int32),
+    ("flags1", 'INT', numpy.int32),
+    ("shadow_z_distance", 'INT', numpy.int32),
+    ("flags2", 'INT', numpy.int32),
+    ("view_vector", 'FLOAT_VECTOR', numpy.float32),
+    ("corona_tex_name", 'INT', numpy.int32),
+    ("shadow_tex_name", 'INT', numpy.int32),
+)
+
+_cloud_packed = ("color",)
+_cloud_vectors = ("view_vector",)
+_cloud_strings = ("corona_tex_name", "shadow_tex_name")
+
+def _pack_bytes(column):
+    packed = numpy.zeros((len(column), 4), dtype=numpy.uint8)
+    packed[:, :column.shape[1]] = column
+    return packed.view(numpy.int32).reshape(-1)
+
+def _unpack_bytes(values, size):
+    return values.view(numpy.uint8).reshape(-1, 4)[:, :size].copy()
+
+def is_light_cloud(obj):
+    return obj.type == 'MESH' and bool(obj.get(CLOUD_MARKER))
+
+def is_cloud_display(obj):
+    return obj.type == 'EMPTY' and bool(obj.get(CLOUD_DISPLAY_MARKER))
+
+def create_light_cloud(table, collection, name="2DFX_Light_Cloud", scene=None,
+                       instance_display=False):
+    """
+    Store the lights of an EffectTable as the points of a single mesh.
+
+    Args:
+        table: EffectTable, only its lights are used. Positions become the
+            vertex coordinates.
+        collection: Collection to link the cloud to.
+        name: Name of the mesh and object.
+        scene: Scene whose registry receives the cloud.
+        instance_display: Instance a small sphere empty on every point so
+            the lights can be seen in the viewport.
+
+    Returns:
+        The cloud object.
+    """
+    lights = table.of_type("LIGHT")
+
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(lights))
+    mesh.vertices.foreach_set("co", lights.position.ravel())
+    mesh[CLOUD_STRINGS] = "\n".join(lights.strings)
+
+    for field, attribute_type, dtype in cloud_attributes:
+        column = getattr(lights, field)
+        if field in _cloud_packed:
+            column = _pack_bytes(column)
+        attribute = mesh.attributes.new("tdfx_" + field, attribute_type, 'POINT')
+        key = "vector" if field in _cloud_vectors else "value"
+        attribute.data.foreach_set(key, column.astype(dtype).ravel())
+    mesh.update()
+
+    cloud = bpy.data.objects.new(name, mesh)
+    cloud[CLOUD_MARKER] = 1
+    collection.objects.link(cloud)
+
+    if instance_display:
+        display = bpy.data.objects.new(name + "_Display", None)
+        display.empty_display_type = 'SPHERE'
+        display.empty_display_size = 0.25
+        display[CLOUD_DISPLAY_MARKER] = 1
+        display.parent = cloud
+        collection.objects.link(display)
+        cloud.instance_type = 'VERTS'
+
+    register_effects([cloud], scene)
+    return cloud
+
+def light_cloud_table(cloud, world=False):
+    """
+    Read a light cloud back into an EffectTable with foreach_get.
+
+    Positions are in the space of the cloud's parent frame, the space a
+    light object's location is exported in, so a cloud exports the same
+    positions as the lights it was made from.
+
+    Args:
+        cloud: Light cloud object.
+        world: Return world space positions instead.
+    """
+    mesh = cloud.data
+    count = len(mesh.vertices)
+    table = EffectTable(count)
+
+    positions = numpy.empty(count * 3, dtype=numpy.float32)
+    mesh.vertices.foreach_get("co", positions)
+    matrix = numpy.array(cloud.matrix_world if world else cloud.matrix_basis,
+                         dtype=numpy.float32)
+    table.position = positions.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+
+    strings = mesh.get(CLOUD_STRINGS, "").split("\n")
+    remap = numpy.array([table.intern(string) for string in strings], dtype=numpy.int32)
+
+    for field, _, dtype in cloud_attributes:
+        attribute = mesh.attributes.get("tdfx_" + field)
+        if attribute is None:
+            continue
+
+        if field in _cloud_vectors:
+            values = numpy.empty(count * 3, dtype=dtype)
+            attribute.data.foreach_get("vector", values)
+            _check_cloud_range(cloud, field, values)
+            setattr(table, field, values.reshape(-1, 3).astype(numpy.int16))
+            continue
+
+        values = numpy.empty(count, dtype=dtype)
+        attribute.data.foreach_get("value", values)
+
+        if field in _cloud_packed:
+            values = _unpack_bytes(values, getattr(table, field).shape[1])
+        elif field in _cloud_strings:
+            values = remap[values]
+        elif dtype is numpy.int32:
+            _check_cloud_range(cloud, field, values)
+            values = values.astype(numpy.uint8)
+        setattr(table, field, values)
+
+    return table
+
+def _check_cloud_range(cloud, field, values):
+    """Raise TdfxExportException if a cloud attribute holds values that don't fit."""
+    low, high = INT_RANGES.get(field, (0, 255))
+    bad = (values < low) | (values > high)
+    if bad.any():
+        raise tdfx_codec.TdfxExportException(
+            f"{cloud.name}: {field} {values[bad][0]} is out of range {low}-{high}")
+
+def _set_parent_frame(objects, parent, parent_inverse):
+    """Parent objects keeping their location as the position in parent space."""
+    for obj in objects:
+        obj.parent = parent
+        obj.matrix_parent_inverse = parent_inverse
+
+def lights_to_cloud(objects, collection=None, scene=None, instance_display=False):
+    """
+    Replace registered light objects by light clouds, one per parent frame.
+
+    Each cloud takes the parent of its lights, and its points are the
+    lights' locations, so the cloud exports the same positions the lights
+    did.
+
+    Returns:
+        List of the cloud objects, empty if no registered lights were given.
+    """
+    if scene is None:
+        scene = bpy.context.scene
+
+    # (parent, parent inverse) -> ([light objects], [effects])
+    frames = {}
+    for obj in objects:
+        entry = effect_entry(obj, scene)
+        if entry is not None and entry.effect_type == 'LIGHT':
+            inverse = obj.matrix_parent_inverse
+            key = (obj.parent, tuple(value for row in inverse for value in row))
+            lights, effects = frames.setdefault(key, ([], []))
+            lights.append(obj)
+            effects.append(registry_effect(entry, obj))
+
+    clouds = []
+    for (parent, _), (lights, effects) in frames.items():
+        cloud = create_light_cloud(EffectTable.from_effects(effects),
+                                   collection or lights[0].users_collection[0],
+                                   scene=scene, instance_display=instance_display)
+        _set_parent_frame([cloud], parent, lights[0].matrix_parent_inverse.copy())
+        clouds.append(cloud)
+
+        for obj in lights:
+            bpy.data.objects.remove(obj)
+
+    if clouds:
+        effect_objects(scene)
+    return clouds
+
+def cloud_to_lights(cloud, scene=None, share_light_data=False):
+    """
+    Replace a light cloud by one light object per point. The cloud's
+    display empty is removed with it, other children keep their place.
+
+    Returns:
+        List of created light objects.
+    """
+    if scene is None:
+        scene = bpy.context.scene
+
+    collection = cloud.users_collection[0]
+    objects = create_effect_objects(light_cloud_table(cloud), collection,
+                                    share_light_data, scene)
+    if cloud.parent is not None:
+        _set_parent_frame(objects, cloud.parent, cloud.matrix_parent_inverse.copy())
+
+    mesh = cloud.data
+    for child in cloud.children:
+        if is_cloud_display(child):
+            bpy.data.objects.remove(child)
+        else:
+            # Anything else parented to the cloud stays where it is
+            matrix = child.matrix_world.copy()
+            child.parent = cloud.parent
+            child.matrix_world = matrix
+    bpy.data.objects.remove(cloud)
+    bpy.data.meshes.remove(mesh)
+    effect_objects(scene)
+
+    return objects
+
+#######################################################
+def mark_dirty(obj):
+    """Force an object's 2DFX record to be repacked on the next export."""
+    _record_cache.pop(obj.name_full, None)
+
+def clear_record_cache():
+    _record_cache.clear()
+
+@persistent
+def _tdfx_depsgraph_update(scene, depsgraph):
+    missing = []
+    for update in depsgraph.updates:
+        if isinstance(update.id, bpy.types.Object):
+            obj = update.id.original
+            _record_cache.pop(obj.name_full, None)
+            if update.is_updated_transform:
+                _spatial_indexes.pop(scene.name_full, None)
+            # Duplicated, pasted or appended objects bring their settings
+            # along but are not registered yet
+            if obj.sdfx.effect_type != 'NONE' and effect_entry(obj, scene) is None:
+                missing.append(obj)
+
+    if missing:
+        register_effects(missing, scene)
+
+@persistent
+def _tdfx_clear_cache(*args):
+    _record_cache.clear()
+    _registry_sets.clear()
+    _name_index.clear()
+    _spatial_indexes.clear()
+
+@persistent
+def _tdfx_load_post(*args):
+    _subscribe_renames()
+    for scene in bpy.data.scenes:
+        migrated = migrate_custom_properties(scene)
+        if migrated:
+            tdfx_log.info(f"Migrated sdfx_* properties of {migrated} objects in {scene.name}")
+
+_tdfx_handlers = (
+    (bpy.app.handlers.depsgraph_update_post, _tdfx_depsgraph_update),
+    (bpy.app.handlers.load_post, _tdfx_clear_cache),
+    (bpy.app.handlers.load_post, _tdfx_load_post),
+    (bpy.app.handlers.undo_post, _tdfx_clear_cache),
+    (bpy.app.handlers.redo_post, _tdfx_clear_cache),
+)
+
+def register_tdfx_handlers():
+    for handlers, func in _tdfx_handlers:
+        if func not in handlers:
+            handlers.append(func)
+    _subscribe_renames()
+
+def unregister_tdfx_handlers():
+    for handlers, func in _tdfx_handlers:
+        if func in handlers:
+            handlers.remove(func)
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    _record_cache.clear()
+    _registry_sets.clear()
+    _name_index.clear()
+    _spatial_indexes.clear()
+
+#######################################################
+def _pack_cached(groups):
+    """
+    Binary records of a set of objects.
+
+    Only objects changed since the last export are repacked, everything
+    else is spliced in from the cached bytes. Light clouds are packed in
+    one go from their columns. Groups of None must be in the cache.
+
+    Returns:
+        (list of record bytes, record count, number of repacked objects)
+    """
+    chunks = []
+    count = 0
+    packed = 0
+    for obj, group in groups:
+        cached = _record_cache.get(obj.name_full)
+        if cached is None:
+            if isinstance(group, EffectTable):
+                cached = (len(group), group.light_records().tobytes())
+            else:
+                cached = (len(group), bytes(tdfx_codec.pack_records(group)))
+            _record_cache[obj.name_full] = cached
+            packed += 1
+        count += cached[0]
+        chunks.append(cached[1])
+    return chunks, count, packed
+
+def export_effects(context, binary_path=None, text_path=None, indexed=False):
+    """
+    Export the selected 2DFX objects to a binary file, a text file or both.
+
+    Every object's effect is gathered once into an effect dict that feeds
+    both sinks. All effects are validated before anything is written, and
+    each file is packed in memory and written atomically. The text file is
+    formatted and written on a background thread while the binary records
+    are packed.
+
+    A binary-only, count-prefixed export skips objects whose records are
+    still cached from the last export. They were validated then and have
+    not changed since, so only changed objects are gathered, validated and
+    packed.
+
+    With indexed set, the binary file is written as an indexed container
+    (see tdfx_codec.EffectContainer) instead of the count-prefixed format.
+
+    Timers and counters go to a new tdfx_log session, whose summary is
+    logged at the end and can be shown with tdfx_log.stats.summary().
+
+    Returns:
+        Number of exported effects.
+
+    Raises:
+        tdfx_codec.TdfxExportException if any effect does not fit the
+        binary formats. No file is touched in that case.
+    """
+    stats = tdfx_log.session("2DFX export")
+
+    # Only the count-prefixed binary records are cached
+    use_cache = bool(binary_path) and not indexed and not text_path
+
+    with stats.timer("gather"):
+        groups = _gather_effects(context.scene, selected_only=True,
+                                 cached=_record_cache if use_cache else None)
+        effects = _flatten(groups)
+    stats.count("objects scanned", len(groups))
+
+    if not groups:
+        tdfx_log.warning("No objects with relevant properties found for export.")
+        return 0
+
+    with stats.timer("validate"):
+        tdfx_codec.validate_effects(
+            effects, fixed_slots=bool(binary_path and indexed),
+            text_encoding=tdfx_codec.TEXT_ENCODING if text_path else None)
+
+    def write_text():
+        with stats.timer("text"):
+            stats.count("bytes written", tdfx_codec.write_text(text_path, effects))
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        text_job = None
+        if text_path:
+            text_job = executor.submit(write_text)
+
+        if binary_path and indexed:
+            with stats.timer("pack"):
+                data = tdfx_codec.pack_container(effects)
+            stats.count("records packed", len(effects))
+            with stats.timer("write"):
+                stats.count("bytes written", tdfx_codec.atomic_write(binary_path, data))
+
+        elif binary_path:
+            with stats.timer("pack"):
+                chunks, count, packed = _pack_cached(groups)
+
+                # Pack everything in memory and hit the disk once
+                data = tdfx_codec.COUNT_STRUCT.pack(count) + b"".join(chunks)
+            stats.count("records packed", count)
+            stats.count("objects repacked", packed)
+            with stats.timer("write"):
+                stats.count("bytes written", tdfx_codec.atomic_write(binary_path, data))
+
+        if text_job is not None:
+            # Re-raises anything the writer thread ran into
+            text_job.result()
+
+    tdfx_log.summary()
+    return count if use_cache else len(effects)
+
+def export_info(context):
+    global effectfile
+    return export_effects(context, binary_path=effectfile,
+                          indexed=context.scene.saeffects_indexed_export)
+
+def export_text(context):
+    global textfile
+    return export_effects(context, text_path=textfile)
+
+# Name pattern -> (object count, objects whose name contains it). Cleared
+# when objects are renamed, and on load and undo. The count catches
+# objects added or removed since the lookup.
+_name_index = {}
+
+# Owner of the rename subscription, which file loads drop
+_msgbus_owner = object()
+
+def _subscribe_renames():
+    bpy.msgbus.clear_by_owner(_msgbus_owner)
+    bpy.msgbus.subscribe_rna(key=(bpy.types.Object, "name"), owner=_msgbus_owner,
+                             args=(), notify=_name_index.clear)
+
+def _find_objects(pattern):
+    """Return the objects whose name contains pattern, cached per pattern."""
+    count = len(bpy.data.objects)
+    cached = _name_index.get(pattern)
+    if cached is None or cached[0] != count:
+        cached = (count, [obj for obj in bpy.data.objects if pattern in obj.name])
+        _name_index[pattern] = cached
+    return cached[1]
+
+def create_lights_from_omni_frames(scene=None, pattern="Omni", share_light_data=True):
+    """
+    Create a 2DFX light for every Omni frame in one batch.
+
+    Frames are the objects whose name contains pattern, looked up through
+    the cached name index, and lights are created through bpy.data, so no
+    operator or context is involved. Each light
+    takes over its frame's parent, parent inverse and local transform, so
+    it ends up exactly where the frame is.
+
+    Returns:
+        (list of created lights, dict of step -> seconds)
+    """
+    if scene is None:
+        scene = bpy.context.scene
+
+    timings = {}
+    start = time.perf_counter()
+
+    frames = [obj for obj in _find_objects(pattern)
+              if obj.type != 'LIGHT' and
+              bpy.data.objects.get(obj.name + "_Light") is None]
+    timings["lookup"] = time.perf_counter() - start
+
+    step = time.perf_counter()
+    defaults = tdfx_codec.LIGHT_DEFAULTS
+    light_cache = LightDataCache() if share_light_data else None
+    lights = []
+    for frame in frames:
+        light = _new_light_object(defaults["color"], defaults["pointlight_range"],
+                                  light_cache, name=frame.name + "_Light")
+        light.parent = frame.parent
+        light.parent_type = frame.parent_type
+        light.parent_bone = frame.parent_bone
+        light.matrix_parent_inverse = frame.matrix_parent_inverse.copy()
+        light.matrix_basis = frame.matrix_basis.copy()
+
+        collections = frame.users_collection
+        (collections[0] if collections else scene.collection).objects.link(light)
+        lights.append(light)
+    timings["create"] = time.perf_counter() - step
+
+    step = time.perf_counter()
+    register_effects(lights, scene)
+    timings["register"] = time.perf_counter() - step
+
+    timings["total"] = time.perf_counter() - start
+    return lights, timings
+
+def _text_plane_mesh():
+    mesh = bpy.data.meshes.new("2DFX_Text_Plane")
+    mesh.from_pydata([(-0.5, -0.5, 0), (0.5, -0.5, 0), (0.5, 0.5, 0), (-0.5, 0.5, 0)],
+                     [], [(0, 1, 2, 3)])
+    return mesh
+
+def create_effect_objects(effects, collection, share_light_data=False,
+                          scene=None):
+    """
+    Create objects for a set of effects through bpy.data.
+
+    Lights become point lights, particles become empties and texts become
+    planes sharing a single mesh, matching what the exporters look for.
+
+    Args:
+        effects: EffectTable, or list of effect dicts as returned by
+            tdfx_codec.parse_text.
+        collection: Collection to link the new objects to.
+        share_light_data: Reuse one light datablock per color and outer range.
+        scene: Scene whose registry receives the effect settings.
+
+    Returns:
+        List of created objects.
+
+    Raises:
+        tdfx_codec.TdfxImportException if a text does not fit the four
+        text lines. No object is created then.
+    """
+    table = effects if isinstance(effects, EffectTable) else EffectTable.from_effects(effects)
+    # Before any object exists, texts that don't fit are rejected here
+    columns = table.registry_columns()
+
+    light_cache = LightDataCache() if share_light_data else None
+    text_mesh = None
+    objects = []
+
+    # Convert the columns used per object to Python values once
+    positions = table.position.tolist()
+    colors = table.color.tolist()
+    outer_ranges = table.pointlight_range.tolist()
+
+    for i, effect_type in enumerate(table.types()):
+        if effect_type == "LIGHT":
+            obj = _new_light_object(colors[i], outer_ranges[i], light_cache)
+
+        elif effect_type == "PARTICLE":
+            obj = bpy.data.objects.new("2DFX_Particle", None)
+
+        else:
+            if text_mesh is None:
+                text_mesh = _text_plane_mesh()
+            obj = bpy.data.objects.new("2DFX_Text_Plane", text_mesh)
+
+        obj.location = positions[i]
+        collection.objects.link(obj)
+        objects.append(obj)
+
+    # Effect settings go into the registry column by column
+    register_effects(objects, scene, columns=columns)
+    return objects
+
+def import_2dfx(filepath, context=None, share_light_data=False):
+    if context is None:
+        context = bpy.context
+
+    effects = tdfx_codec.read_text(filepath)
+
+    # Fill an unlinked collection first, then link it once so the scene
+    # only sees a single change and the depsgraph is evaluated once
+    collection = bpy.data.collections.new(os.path.basename(filepath))
+    objects = create_effect_objects(effects, collection, share_light_data,
+                                    context.scene)
+    context.collection.children.link(collection)
+    context.view_layer.update()
+
+    return objects
+
+def create_lights_from_columns(columns, collection, share_light_data=False,
+                               scene=None):
+    """
+    Create light objects from columnar light data.
+
+    Args:
+        columns: Dict of field name -> array, as returned by
+            tdfx_codec.read_light_columns.
+        collection: Collection to link the new objects to.
+        share_light_data: Reuse one light datablock per color and outer range.
+        scene: Scene whose registry receives the light settings.
+
+    Returns:
+        List of created light objects.
+    """
+    return create_effect_objects(EffectTable.from_light_columns(columns),
+                                 collection, share_light_data, scene)
+
+def section_entry_effect(entry):
+    """
+    Convert a parsed 2d Effect entry object into an effect dict by its
+    effect_id. Entry types without a decoder keep their raw data, like
+    tdfx_codec.unpack_effect_section does, and are None without any.
+    """
+    if isinstance(entry, dict):
+        return entry
+
+    entry_type = getattr(entry, "effect_id", tdfx_codec.SECTION_ENTRY_TYPES["LIGHT"])
+    effect_type = tdfx_codec.SECTION_ENTRY_DECODERS.get(entry_type, (None,))[0]
+
+    if effect_type == "LIGHT":
+        return entry_effect(entry)
+
+    effect = {"type": effect_type, "position": _entry_position(entry)}
+    if effect_type == "PARTICLE":
+        effect["psys"] = getattr(entry, "effect", None) or getattr(
+            entry, "psys", tdfx_codec.PARTICLE_DEFAULTS["psys"])
+    elif effect_type == "TEXT":
+        lines = [getattr(entry, f"text{line}", "") for line in range(1, 5)]
+        effect.update({
+            "size": tuple(getattr(entry, "size", (1.0, 1.0))),
+            "rotation": tuple(getattr(entry, "rotation", (0.0, 0.0, 0.0))),
+            "flags": getattr(entry, "flags", 0),
+            "text_data": _join_text_lines(lines),
+        })
+    else:
+        data = getattr(entry, "data", None)
+        if not isinstance(data, (bytes, bytearray)):
+            return None
+        effect.update({
+            "type": tdfx_codec.SECTION_RAW_TYPES.get(entry_type, "UNKNOWN"),
+            "entry_type": entry_type,
+            "data": bytes(data),
+        })
+
+    return effect
+
+def _section_effects(section):
+    if isinstance(section, (bytes, bytearray, memoryview)):
+        return tdfx_codec.unpack_effect_section(section)
+
+    effects = []
+    for entry in getattr(section, "entries", ()):
+        effect = section_entry_effect(entry)
+        if effect is None:
+            tdfx_log.warning("Skipped a 2d Effect entry of type %s without raw data",
+                             getattr(entry, "effect_id", "?"))
+            continue
+        effects.append(effect)
+    return effects
+
+def dff_effect_sections(importer):
+    """
+    Find the 2d Effect sections of an imported DFF.
+
+    Returns:
+        List of (frame object or None, effect dicts) pairs, one per
+        geometry carrying a 2d Effect section.
+    """
+    dff = getattr(importer, "dff", None)
+    geometries = getattr(dff, "geometry_list", None) or []
+    objects = getattr(importer, "objects", None) or []
+
+    # Geometry index -> object of the atomic's frame
+    frames = {}
+    for atomic in getattr(dff, "atomic_list", None) or []:
+        if atomic.frame < len(objects):
+            frames.setdefault(atomic.geometry, objects[atomic.frame])
+
+    sections = []
+    for index, geometry in enumerate(geometries):
+        extensions = getattr(geometry, "extensions", None) or {}
+        section = extensions.get("2d_effect")
+        if section is None:
+            section = extensions.get(tdfx_codec.EFFECT_SECTION_ID)
+        if section is not None:
+            sections.append((frames.get(index), _section_effects(section)))
+
+    return sections
+
+# Object properties of the empties holding 2d Effect entries that have no
+# registry representation, e.g. ped attractors: the section entry type and
+# the entry data as hex
+RAW_ENTRY_TYPE = "tdfx_entry_type"
+RAW_ENTRY_DATA = "tdfx_data"
+
+def import_dff_effects(importer, context=None, share_light_data=False):
+    """
+    Create objects for the 2d Effect sections of an imported DFF.
+
+    Effects are parented to the frame of their geometry's atomic, so their
+    section positions are used as local coordinates.
+
+    Returns:
+        List of created objects.
+    """
+    global entries
+
+    if context is None:
+        context = bpy.context
+
+    objects = []
+    lights = []
+    for frame, effects in dff_effect_sections(importer):
+        if frame is not None and frame.users_collection:
+            collection = frame.users_collection[0]
+        else:
+            collection = context.collection
+
+        table = EffectTable.from_effects(effects)
+        created = create_effect_objects(table, collection, share_light_data,
+                                        context.scene)
+
+        # Entry types without a registry representation stay visible as
+        # empties carrying their raw data
+        for effect in effects:
+            if "entry_type" not in effect:
+                continue
+            obj = bpy.data.objects.new(f"2DFX_{effect['type'].title()}", None)
+            obj.location = effect["position"]
+            obj[RAW_ENTRY_TYPE] = effect["entry_type"]
+            obj[RAW_ENTRY_DATA] = effect["data"].hex()
+            collection.objects.link(obj)
+            created.append(obj)
+
+        if frame is not None:
+            for obj in created:
+                obj.parent = frame
+
+        lights.append(table.of_type("LIGHT"))
+        objects.extend(created)
+
+    entries = EffectTable.concatenate(lights)
+    return objects
+
+def import_2dfx_binary(filepath, collection, share_light_data=False):
+    if tdfx_codec.is_container(filepath):
+        with tdfx_codec.EffectContainer(filepath) as container:
+            table = EffectTable.from_container(container)
+        return create_effect_objects(table, collection, share_light_data)
+
+    columns = tdfx_codec.read_light_columns(filepath)
+    return create_lights_from_columns(columns, collection, share_light_data)
+
+class SAEFFECTS_OT_Import2dfxBinary(Operator):
+    """Import a binary 2DFX file written by Export Binary Info, light-only or indexed."""
+    bl_idname = "saeffects.import_2dfx_binary"
+    bl_label = "Import Binary 2DFX File"
+
+    filename_ext = ".bin"
+    filter_glob: StringProperty(default="*.bin;*.2dfx", options={'HIDDEN'})
+    filepath: StringProperty(subtype="FILE_PATH")
+
+    share_light_data: BoolProperty(
+        name="Share Light Data",
+        description="Lights with the same color and outer range share one light datablock",
+        default=False
+    )
+
+    def execute(self, context):
+        try:
+            objects = import_2dfx_binary(self.filepath, context.collection,
+                                         self.share_light_data)
+        except tdfx_codec.TdfxImportException as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Imported {len(objects)} 2DFX entries.")
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+class SAEFFECTS_OT_Import2dfx(Operator):
+    bl_idname = "saeffects.import_2dfx"
+    bl_label = "Import 2DFX File"
+    
+    filename_ext = ".2dfx"
+    filter_glob: StringProperty(default="*.2dfx", options={'HIDDEN'})
+    filepath: StringProperty(subtype="FILE_PATH")
+
+    share_light_data: BoolProperty(
+        name="Share Light Data",
+        description="Lights with the same color and outer range share one light datablock",
+        default=False
+    )
+
+    def execute(self, context):
+        try:
+            objects = import_2dfx(self.filepath, context, self.share_light_data)
+        except tdfx_codec.TdfxImportException as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Imported {len(objects)} 2DFX entries.")
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+#######################################################
+def bulk_edit_effects(scene, assignments, effect_type=None, texture=None,
+                      color_range=None, bounds=None, selected_only=False):
+    """
+    Assign field values to every registered 2DFX object matching a filter.
+
+    Filtering and assignment run on whole registry columns, and only the
+    entries whose values actually change are marked dirty. Light clouds
+    keep their settings in point attributes, not in their registry entry,
+    so they are never edited.
+
+    Args:
+        scene: Scene whose effect registry is edited.
+        assignments: Dict of registry field -> new value.
+        effect_type: Only edit entries of this type, e.g. 'LIGHT'.
+        texture: fnmatch pattern the corona texture name has to match.
+        color_range: (low, high) RGBA bounds, inclusive.
+        bounds: (min corner, max corner) of a world space box.
+        selected_only: Only edit selected objects.
+
+    Returns:
+        Number of objects that changed.
+    """
+    objects = effect_objects(scene)
+    registry = scene.sdfx_effects
+
+    numeric = {name: size for name, _, size in effect_columns}
+    fields = set(assignments) | {"color", "corona_tex_name"}
+    columns = read_effect_columns(scene, fields)
+
+    types = numpy.array([entry.effect_type for entry in registry], dtype=object)
+    mask = types != 'CLOUD'
+    if effect_type is not None:
+        mask &= types == effect_type
+    if texture:
+        pattern = texture.lower()
+        mask &= numpy.array([fnmatch.fnmatchcase(name.lower(), pattern)
+                             for name in columns["corona_tex_name"]], dtype=bool)
+    if color_range is not None:
+        color = columns["color"]
+        mask &= ((color >= numpy.asarray(color_range[0])) &
+                 (color <= numpy.asarray(color_range[1]))).all(axis=1)
+    if bounds is not None:
+        positions = numpy.array([obj.matrix_world.translation[:] for obj in objects],
+                                dtype=numpy.float32).reshape(-1, 3)
+        mask &= ((positions >= numpy.asarray(bounds[0])) &
+                 (positions <= numpy.asarray(bounds[1]))).all(axis=1)
+    if selected_only:
+        mask &= numpy.array([obj.select_get() for obj in objects], dtype=bool)
+
+    changed = numpy.zeros(len(registry), dtype=bool)
+    for name, value in assignments.items():
+        column = columns[name]
+
+        if name in numeric:
+            value = numpy.asarray(value, dtype=column.dtype)
+            differs = column != value
+            if column.ndim > 1:
+                differs = differs.any(axis=1)
+            rows = mask & differs
+            if rows.any():
+                column[rows] = value
+                registry.foreach_set(name, column.ravel())
+        else:
+            rows = mask & numpy.array([current != value for current in column], dtype=bool)
+            with _settings_sync():
+                for row in numpy.flatnonzero(rows).tolist():
+                    setattr(registry[row], name, value)
+
+        changed |= rows
+
+    for row in numpy.flatnonzero(changed).tolist():
+        _copy_settings(registry[row], objects[row].sdfx, list(assignments))
+        mark_dirty(objects[row])
+
+    return int(changed.sum())
+
+# Fields the bulk editor can assign: (field, label)
+bulk_edit_fields = (
+    ("color", "Color"),
+    ("corona_far_clip", "Draw Distance"),
+    ("pointlight_range", "Outer Range"),
+    ("corona_size", "Size"),
+    ("shadow_size", "Inner Range"),
+    ("corona_show_mode", "Show Mode"),
+    ("corona_enable_reflection", "Reflection"),
+    ("corona_flare_type", "Flare Type"),
+    ("shadow_color_multiplier", "Shadow Color Multiplier"),
+    ("flags1", "Flags 1"),
+    ("flags2", "Flags 2"),
+    ("corona_tex_name", "Corona"),
+    ("shadow_tex_name", "Shadow"),
+)
+
+class SAEFFECTS_OT_BulkEdit(Operator):
+    """Assign 2DFX settings to all registered effects matching a filter"""
+    bl_idname = "saeffects.bulk_edit"
+    bl_label = "Bulk Edit 2DFX"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    # Filter
+    effect_type: bpy.props.EnumProperty(
+        name="Type",
+        items=(('ALL', "All", "Any effect type except light clouds"),) +
+              tuple(item for item in effect_types if item[0] != 'CLOUD'),
+        default='LIGHT'
+    )
+    texture: StringProperty(
+        name="Corona Texture",
+        description="Only edit effects whose corona texture matches this pattern, e.g. coronastar*",
+        default=""
+    )
+    selected_only: BoolProperty(name="Only Selected", default=False)
+    use_color_range: BoolProperty(name="Filter by Color", default=False)
+    color_min: IntVectorProperty(name="Color Min", size=4, min=0, max=255,
+                                 default=(0, 0, 0, 0))
+    color_max: IntVectorProperty(name="Color Max", size=4, min=0, max=255,
+                                 default=(255, 255, 255, 255))
+    use_bounds: BoolProperty(name="Filter by Box", default=False)
+    bounds_min: FloatVectorProperty(name="Box Min", size=3, subtype='XYZ')
+    bounds_max: FloatVectorProperty(name="Box Max", size=3, subtype='XYZ')
+
+    # Assignments, each with its own toggle
+    set_color: BoolProperty(name="Set Color", default=False)
+    color: IntVectorProperty(name="Color", size=4, min=0, max=255,
+                             default=tdfx_codec.LIGHT_DEFAULTS["color"])
+    set_corona_far_clip: BoolProperty(name="Set Draw Distance", default=False)
+    corona_far_clip: FloatProperty(name="Draw Distance",
+                                   default=tdfx_codec.LIGHT_DEFAULTS["corona_far_clip"])
+    set_pointlight_range: BoolProperty(name="Set Outer Range", default=False)
+    pointlight_range: FloatProperty(name="Outer Range",
+                                    default=tdfx_codec.LIGHT_DEFAULTS["pointlight_range"])
+    set_corona_size: BoolProperty(name="Set Size", default=False)
+    corona_size: FloatProperty(name="Size",
+                               default=tdfx_codec.LIGHT_DEFAULTS["corona_size"])
+    set_shadow_size: BoolProperty(name="Set Inner Range", default=False)
+    shadow_size: FloatProperty(name="Inner Range",
+                               default=tdfx_codec.LIGHT_DEFAULTS["shadow_size"])
+    set_corona_show_mode: BoolProperty(name="Set Show Mode", default=False)
+    corona_show_mode: IntProperty(name="Show Mode", min=0, max=255,
+                                  default=tdfx_codec.LIGHT_DEFAULTS["corona_show_mode"])
+    set_corona_enable_reflection: BoolProperty(name="Set Reflection", default=False)
+    corona_enable_reflection: IntProperty(name="Reflection", min=0, max=255, default=0)
+    set_corona_flare_type: BoolProperty(name="Set Flare Type", default=False)
+    corona_flare_type: IntProperty(name="Flare Type", min=0, max=255, default=0)
+    set_shadow_color_multiplier: BoolProperty(name="Set Shadow Color Multiplier", default=False)
+    shadow_color_multiplier: IntProperty(name="Shadow Color Multiplier", min=0, max=255,
+                                         default=tdfx_codec.LIGHT_DEFAULTS["shadow_color_multiplier"])
+    set_flags1: BoolProperty(name="Set Flags 1", default=False)
+    flags1: IntProperty(name="Flags 1", min=0, max=255,
+                        default=tdfx_codec.LIGHT_DEFAULTS["flags1"])
+    set_flags2: BoolProperty(name="Set Flags 2", default=False)
+    flags2: IntProperty(name="Flags 2", min=0, max=255, default=0)
+    set_corona_tex_name: BoolProperty(name="Set Corona", default=False)
+    corona_tex_name: StringProperty(name="Corona",
+                                    default=tdfx_codec.LIGHT_DEFAULTS["corona_tex_name"])
+    set_shadow_tex_name: BoolProperty(name="Set Shadow", default=False)
+    shadow_tex_name: StringProperty(name="Shadow",
+                                    default=tdfx_codec.LIGHT_DEFAULTS["shadow_tex_name"])
+
+    def draw(self, context):
+        layout = self.layout
+
+        box = layout.box()
+        box.label(text="Filter")
+        box.prop(self, "effect_type")
+        box.prop(self, "texture")
+        box.prop(self, "selected_only")
+        box.prop(self, "use_color_range")
+        if self.use_color_range:
+            box.prop(self, "color_min")
+            box.prop(self, "color_max")
+        box.prop(self, "use_bounds")
+        if self.use_bounds:
+            box.prop(self, "bounds_min")
+            box.prop(self, "bounds_max")
+
+        box = layout.box()
+        box.label(text="Assign")
+        for field, label in bulk_edit_fields:
+            row = box.row()
+            row.prop(self, "set_" + field, text="")
+            sub = row.row()
+            sub.enabled = getattr(self, "set_" + field)
+            sub.prop(self, field, text=label)
+
+    def execute(self, context):
+        assignments = {}
+        for field, _ in bulk_edit_fields:
+            if getattr(self, "set_" + field):
+                value = getattr(self, field)
+                assignments[field] = value if isinstance(value, (str, int, float)) else tuple(value)
+
+        if not assignments:
+            self.report({'WARNING'}, "Nothing to assign.")
+            return {'CANCELLED'}
+
+        count = bulk_edit_effects(
+            context.scene, assignments,
+            effect_type=None if self.effect_type == 'ALL' else self.effect_type,
+            texture=self.texture,
+            color_range=(tuple(self.color_min), tuple(self.color_max)) if self.use_color_range else None,
+            bounds=(tuple(self.bounds_min), tuple(self.bounds_max)) if self.use_bounds else None,
+            selected_only=self.selected_only)
+
+        self.report({'INFO'}, f"Changed {count} 2DFX objects.")
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self, width=400)
+
+#######################################################
+
+class DFF2dfxPanel(Panel):
+    bl_label = "DemonFF - 2DFX"
+    bl_idname = "PT_DFF2DFX"
+    bl_space_type = "PROPERTIES"
+    bl_region_type = "WINDOW"
+    bl_context = "object"
+
+    def draw(self, context):
+        layout = self.layout
+
+        box = layout.box()
+        row = box.row()
+        row.operator("saeffects.add_light_info", text="Add Light Info")
+        row = box.row()
+        row.operator("saeffects.add_particle_info", text="Add Particle Info")
+        row = box.row()
+        row.operator("saeffects.add_text_info", text="Add 2D Text Info")
+        row = box.row()
+        row.prop(context.scene, "saeffects_export_path")
+        row = box.row()
+        row.prop(context.scene, "saeffects_text_export_path")
+        row = box.row()
+        row.prop(context.scene, "saeffects_indexed_export")
+        row = box.row()
+        row.operator("saeffects.export_info", text="Export Binary Info")
+        row = box.row()
+        row.operator("saeffects.export_text_info", text="Export Text Info")
+        row = box.row()
+        row.operator("saeffects.export_all_info", text="Export Binary and Text Info")
+        row = box.row()
+        row.operator("saeffects.create_lights_from_omni", text="Create Lights from Omni Frames")
+        row = box.row()
+        row.operator("saeffects.view_light_info", text="View Light Info")
+        row = box.row()
+        row.operator("saeffects.import_2dfx", text="Import 2DFX File")
+        row = box.row()
+        row.operator("saeffects.import_2dfx_binary", text="Import Binary 2DFX File")
+        row = box.row()
+        row.operator("saeffects.rebuild_registry", text="Rebuild 2DFX Registry")
+        row = box.row()
+        row.operator("saeffects.bulk_edit", text="Bulk Edit 2DFX")
+        row = box.row()
+        row.operator("saeffects.lights_to_cloud", text="Lights to Point Cloud")
+        row.operator("saeffects.cloud_to_lights", text="Point Cloud to Lights")
+
+#######################################################
+
+class SAEFFECTS_OT_AddLightInfo(Operator):
+    bl_idname = "saeffects.add_light_info"
+    bl_label = "Add Light Info"
+    
+
+    def execute(self, context):
+
+        frames = context.scene.collection.children 
+        tdfx_log.session("2DFX lights")
+        add_light_info(frames, entries)
+        self.report({'INFO'}, tdfx_log.summary())
+        return {'FINISHED'}
+
+class SAEFFECTS_OT_AddParticleInfo(Operator):
+    bl_idname = "saeffects.add_particle_info"
+    bl_label = "Add Particle Info"
+    
+    def execute(self, context):
+        add_particle_info(context)
+        return {'FINISHED'}
+
+class SAEFFECTS_OT_AddTextInfo(Operator):
+    bl_idname = "saeffects.add_text_info"
+    bl_label = "Add 2D Text Info"
+    
+    def execute(self, context):
+        add_text_info(context)
+        return {'FINISHED'}
+
+class SAEFFECTS_OT_ExportInfo(Operator):
+    bl_idname = "saeffects.export_info"
+    bl_label = "Export Binary Info"
+    
+    def execute(self, context):
+        global effectfile
+        effectfile = bpy.path.abspath(context.scene.saeffects_export_path)
+        try:
+            export_info(context)
+        except tdfx_codec.TdfxExportException as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, tdfx_log.stats.summary())
+        return {'FINISHED'}
+
+class SAEFFECTS_OT_ExportAllInfo(Operator):
+    """Export the binary and text 2DFX files in a single pass"""
+    bl_idname = "saeffects.export_all_info"
+    bl_label = "Export Binary and Text Info"
+
+    def execute(self, context):
+        try:
+            count = export_effects(
+                context,
+                binary_path=bpy.path.abspath(context.scene.saeffects_export_path),
+                text_path=bpy.path.abspath(context.scene.saeffects_text_export_path),
+                indexed=context.scene.saeffects_indexed_export)
+        except tdfx_codec.TdfxExportException as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Exported {count} 2DFX entries. {tdfx_log.stats.summary()}")
+        return {'FINISHED'}
+
+class SAEFFECTS_OT_ExportTextInfo(Operator):
+    bl_idname = "saeffects.export_text_info"
+    bl_label = "Export Text Info"
+    
+    filepath: StringProperty(subtype="FILE_PATH")
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        global textfile
+        textfile = self.filepath
+        try:
+            export_text(context)
+        except tdfx_codec.TdfxExportException as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, tdfx_log.stats.summary())
+        return {'FINISHED'}
+
+class SAEFFECTS_OT_CreateLightsFromOmni(Operator):
+    bl_idname = "saeffects.create_lights_from_omni"
+    bl_label = "Create Lights from Omni Frames"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def execute(self, context):
+        lights, timings = create_lights_from_omni_frames(context.scene)
+        self.report({'INFO'},
+                    f"Created {len(lights)} lights from Omni frames in {timings['total']:.3f}s "
+                    f"(lookup {timings['lookup']:.3f}s, create {timings['create']:.3f}s, "
+                    f"register {timings['register']:.3f}s)")
+        return {'FINISHED'}
+
+class SAEFFECTS_OT_RebuildRegistry(Operator):
+    """Sync the effect registry with the objects' 2DFX settings and migrate sdfx_* custom properties"""
+    bl_idname = "saeffects.rebuild_registry"
+    bl_label = "Rebuild 2DFX Registry"
+
+    def execute(self, context):
+        migrated = migrate_custom_properties(context.scene)
+        self.report({'INFO'}, f"Registered {len(context.scene.sdfx_effects)} 2DFX objects, "
+                              f"migrated {migrated}.")
+        return {'FINISHED'}
+
+class SAEFFECTS_OT_LightsToCloud(Operator):
+    """Store the selected 2DFX lights as the points of one mesh per parent"""
+    bl_idname = "saeffects.lights_to_cloud"
+    bl_label = "Lights to Point Cloud"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    instance_display: BoolProperty(
+        name="Instance Display",
+        description="Show a small sphere on every light of the cloud",
+        default=True
+    )
+
+    def execute(self, context):
+        clouds = lights_to_cloud(context.selected_objects, context.collection,
+                                 context.scene, self.instance_display)
+        if not clouds:
+            self.report({'ERROR'}, "No 2DFX lights selected.")
+            return {'CANCELLED'}
+
+        count = sum(len(cloud.data.vertices) for cloud in clouds)
+        self.report({'INFO'}, f"Stored {count} lights in {len(clouds)} point clouds.")
+        return {'FINISHED'}
+
+class SAEFFECTS_OT_CloudToLights(Operator):
+    """Turn the active light cloud back into one light object per point"""
+    bl_idname = "saeffects.cloud_to_lights"
+    bl_label = "Point Cloud to Lights"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    share_light_data: BoolProperty(
+        name="Share Light Data",
+        description="Lights with the same color and outer range share one light datablock",
+        default=True
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return context.object is not None and is_light_cloud(context.object)
+
+    def execute(self, context):
+        try:
+            objects = cloud_to_lights(context.object, context.scene, self.share_light_data)
+        except tdfx_codec.TdfxExportException as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Created {len(objects)} lights.")
+        return {'FINISHED'}
+
+class SAEFFECTS_OT_ViewLightInfo(Operator):
+    bl_idname = "saeffects.view_light_info"
+    bl_label = "View Light Info"
+
+    def execute(self, context):
+        for obj in context.selected_objects:
+            if obj.type == 'LIGHT':
+                context.view_layer.objects.active = obj
+                bpy.ops.wm.properties_add(data_path='object')
+        return {'FINISHED'}
+
+class OBJECT_PT_SDFXLightInfoPanel(Panel):
+    bl_label = "SDFX Info"
+    bl_idname = "OBJECT_PT_sdfx_light_info"
+    bl_space_type = 'PROPERTIES'
+    bl_region_type = 'WINDOW'
+    bl_context = "object"
+    
+    @classmethod
+    def poll(cls, context):
+        return context.object and context.object.sdfx.effect_type != 'NONE'
+    
+    def draw(self, context):
+        layout = self.layout
+        settings = context.object.sdfx
+
+        if settings.effect_type == 'PARTICLE':
+            layout.prop(settings, "psys")
+            return
+
+        if settings.effect_type == 'TEXT':
+            for name in _text_lines + _roadsign_fields:
+                layout.prop(settings, name)
+            return
+
+        if settings.effect_type == 'CLOUD':
+            layout.label(text=f"{len(context.object.data.vertices)} lights")
+            layout.operator("saeffects.cloud_to_lights", text="Point Cloud to Lights")
+            return
+
+        layout.prop(settings, "color")
+        layout.prop(settings, "corona_far_clip", text="Draw Distance")
+        layout.prop(settings, "pointlight_range", text="Outer Range")
+        layout.prop(settings, "corona_size", text="Size")
+        layout.prop(settings, "shadow_size", text="Inner Range")
+        layout.prop(settings, "corona_tex_name", text="Corona")
+        layout.prop(settings, "shadow_tex_name", text="Shadow")
+        
+        layout.prop(settings, "flags1", text="On All Day")
+        layout.prop(settings, "corona_show_mode", text="Show Mode")
+        layout.prop(settings, "corona_enable_reflection", text="Reflection")
+        layout.prop(settings, "corona_flare_type", text="Flare Type")
+        layout.prop(settings, "shadow_color_multiplier", text="Shadow Color Multiplier")
+        layout.prop(settings, "shadow_z_distance", text="Shadow Z Distance")
+        layout.prop(settings, "flags2", text="Flags 2")
+        layout.prop(settings, "view_vector", text="View Vector")
+
+    def set_light_color(obj, color):
+        """
+        Safely set the color of a Blender light object.
+        
+        Args:
+            obj: The Blender light object.
+            color: A tuple (R, G, B) where values are between 0 and 255.
+        """
+        if obj and obj.type == 'LIGHT':
+            # Ensure color is normalized
+            normalized_color = (
+                color[0] / 255,  # Normalize R
+                color[1] / 255,  # Normalize G
+                color[2] / 255,  # Normalize B
+            )
+            obj.data.color = normalized_color
+
+
+#######################################################
+
+def register():
+    bpy.utils.register_class(SDFXEffectSettings)
+    bpy.utils.register_class(SDFXEffectEntry)
+    bpy.utils.register_class(DFF2dfxPanel)
+    bpy.utils.register_class(SAEFFECTS_OT_AddLightInfo)
+    bpy.utils.register_class(SAEFFECTS_OT_AddParticleInfo)
+    bpy.utils.register_class(SAEFFECTS_OT_AddTextInfo)
+    bpy.utils.register_class(SAEFFECTS_OT_ExportInfo)
+    bpy.utils.register_class(SAEFFECTS_OT_ExportTextInfo)
+    bpy.utils.register_class(SAEFFECTS_OT_ExportAllInfo)
+    bpy.utils.register_class(SAEFFECTS_OT_CreateLightsFromOmni)
+    bpy.utils.register_class(SAEFFECTS_OT_ViewLightInfo)
+    bpy.utils.register_class(SAEFFECTS_OT_RebuildRegistry)
+    bpy.utils.register_class(SAEFFECTS_OT_BulkEdit)
+    bpy.utils.register_class(SAEFFECTS_OT_LightsToCloud)
+    bpy.utils.register_class(SAEFFECTS_OT_CloudToLights)
+    bpy.utils.register_class(SAEFFECTS_OT_Import2dfx)
+    bpy.utils.register_class(SAEFFECTS_OT_Import2dfxBinary)
+    bpy.utils.register_class(SAEEFFECTS_OT_CreateLightsFromEntries)
+    bpy.utils.register_class(OBJECT_PT_SDFXLightInfoPanel)
+    register_tdfx_handlers()
+    bpy.types.Object.sdfx = bpy.props.PointerProperty(type=SDFXEffectSettings)
+    bpy.types.Scene.sdfx_effects = bpy.props.CollectionProperty(type=SDFXEffectEntry)
+    bpy.types.Scene.saeffects_export_path = StringProperty(
+        name="Export Path",
+        description="Path to export the effects binary file",
+        subtype='FILE_PATH'
+    )
+    bpy.types.Scene.saeffects_text_export_path = StringProperty(
+        name="Text Export Path",
+        description="Path to export the effects text file",
+        subtype='FILE_PATH'
+    )
+    bpy.types.Scene.saeffects_indexed_export = BoolProperty(
+        name="Indexed Container",
+        description="Export the binary file as a seekable container with an offset table",
+        default=False
+    )
+
+#######################################################
+
+def unregister():
+    bpy.utils.unregister_class(DFF2dfxPanel)
+    bpy.utils.unregister_class(SAEFFECTS_OT_AddLightInfo)
+    bpy.utils.unregister_class(SAEFFECTS_OT_AddParticleInfo)
+    bpy.utils.unregister_class(SAEFFECTS_OT_AddTextInfo)
+    bpy.utils.unregister_class(SAEFFECTS_OT_ExportInfo)
+    bpy.utils.unregister_class(SAEFFECTS_OT_ExportTextInfo)
+    bpy.utils.unregister_class(SAEFFECTS_OT_ExportAllInfo)
+    bpy.utils.unregister_class(SAEFFECTS_OT_CreateLightsFromOmni)
+    bpy.utils.unregister_class(SAEFFECTS_OT_ViewLightInfo)
+    bpy.utils.unregister_class(SAEFFECTS_OT_RebuildRegistry)
+    bpy.utils.unregister_class(SAEFFECTS_OT_BulkEdit)
+    bpy.utils.unregister_class(SAEFFECTS_OT_LightsToCloud)
+    bpy.utils.unregister_class(SAEFFECTS_OT_CloudToLights)
+    bpy.utils.unregister_class(SAEFFECTS_OT_Import2dfx)
+    bpy.utils.unregister_class(SAEFFECTS_OT_Import2dfxBinary)
+    bpy.utils.unregister_class(SAEEFFECTS_OT_CreateLightsFromEntries)
+    bpy.utils.unregister_class(OBJECT_PT_SDFXLightInfoPanel)
+    unregister_tdfx_handlers()
+    del bpy.types.Object.sdfx
+    del bpy.types.Scene.sdfx_effects
+    del bpy.types.Scene.saeffects_export_path
+    del bpy.types.Scene.saeffects_text_export_path
+    del bpy.types.Scene.saeffects_indexed_export
+    bpy.utils.unregister_class(SDFXEffectEntry)
+    bpy.utils.unregister_class(SDFXEffectSettings)
+
+#######################################################
+
+if __name__ == "__main__":
+    register()
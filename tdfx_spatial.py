@@ -0,0 +1,68 @@
+from mathutils import kdtree
+
+# Default distance within which a frame may own a 2DFX entry
+FRAME_TOLERANCE = 10.0
+
+#######################################################
+class SpatialIndex:
+    """
+    KD-tree over a fixed set of items and their positions.
+
+    Building is O(n log n) and each query is O(log n), so associating m
+    entries with n frames costs O((n + m) log n) instead of O(n * m).
+    """
+
+    def __init__(self, items, positions):
+        self.items = list(items)
+        self.tree = kdtree.KDTree(len(self.items))
+
+        for i, co in enumerate(positions):
+            self.tree.insert(co, i)
+        self.tree.balance()
+
+    #######################################################
+    @classmethod
+    def from_objects(cls, objects):
+        """Index Blender objects by their world space location."""
+        objects = list(objects)
+        return cls(objects, [obj.matrix_world.translation for obj in objects])
+
+    #######################################################
+    def __len__(self):
+        return len(self.items)
+
+    #######################################################
+    def nearest(self, co, tolerance=None):
+        """Return the item closest to co, or None if none is within tolerance."""
+        if not self.items:
+            return None
+
+        _, index, distance = self.tree.find(co)
+        if index is None or (tolerance is not None and distance > tolerance):
+            return None
+        return self.items[index]
+
+    #######################################################
+    def within_radius(self, co, radius):
+        """Return (item, distance) pairs within radius of co, nearest first."""
+        found = self.tree.find_range(co, radius)
+        found.sort(key=lambda result: result[2])
+        return [(self.items[index], distance) for _, index, distance in found]
+
+#######################################################
+def associate(entries, positions, owners, tolerance=FRAME_TOLERANCE):
+    """
+    Pair each entry with the nearest owner object within tolerance.
+
+    Args:
+        entries: Sequence of entries to associate.
+        positions: World space position of each entry.
+        owners: Candidate owner objects, e.g. frames.
+        tolerance: Maximum distance, or None for no limit.
+
+    Returns:
+        List of (entry, owner or None) pairs in entry order.
+    """
+    index = SpatialIndex.from_objects(owners)
+    return [(entry, index.nearest(co, tolerance))
+            for entry, co in zip(entries, positions)]
@@ -0,0 +1,308 @@
+import numpy
+
+from . import tdfx_codec
+
+# This module has no bpy dependency. An EffectTable holds the same data as
+# a list of effect dicts (see tdfx_codec), one NumPy array per field.
+
+EFFECT_TYPES = ("LIGHT", "PARTICLE", "TEXT")
+
+# Numeric fields: (name, dtype, components)
+NUMERIC_FIELDS = (
+    ("position", numpy.float32, 3),
+    ("color", numpy.uint8, 4),
+    ("corona_far_clip", numpy.float32, 1),
+    ("pointlight_range", numpy.float32, 1),
+    ("corona_size", numpy.float32, 1),
+    ("shadow_size", numpy.float32, 1),
+    ("corona_show_mode", numpy.uint8, 1),
+    ("corona_enable_reflection", numpy.uint8, 1),
+    ("corona_flare_type", numpy.uint8, 1),
+    ("shadow_color_multiplier", numpy.uint8, 1),
+    ("flags1", numpy.uint8, 1),
+    ("shadow_z_distance", numpy.uint8, 1),
+    ("flags2", numpy.uint8, 1),
+    ("view_vector", numpy.int16, 3),
+    ("size", numpy.float32, 2),
+    ("rotation", numpy.float32, 3),
+    ("flags", numpy.uint16, 1),
+)
+
+# String fields, stored as indices into the table's string pool
+STRING_FIELDS = ("corona_tex_name", "shadow_tex_name", "psys", "text_data")
+
+DEFAULTS = dict(tdfx_codec.LIGHT_DEFAULTS,
+                position=(0.0, 0.0, 0.0),
+                **tdfx_codec.PARTICLE_DEFAULTS,
+                **tdfx_codec.TEXT_DEFAULTS)
+
+# Fields each effect type carries when turned back into a dict
+TYPE_FIELDS = {
+    "LIGHT": list(tdfx_codec.LIGHT_DEFAULTS),
+    "PARTICLE": ["psys"],
+    "TEXT": ["text_data", "size", "rotation", "flags"],
+}
+
+# Accepted range of the integer fields, (0, 255) unless listed. View vector
+# components are bytes too, but are written either signed or unsigned.
+INT_RANGES = {
+    "view_vector": (-128, 255),
+    "flags": (0, 65535),
+}
+
+# Registry text fields: lines of 16 characters, like roadsign entries
+TEXT_LINES = 4
+TEXT_LINE_LENGTH = 16
+
+#######################################################
+def split_text_lines(texts):
+    """
+    Split text_data values into the registry's four text line columns.
+
+    Raises:
+        tdfx_codec.TdfxImportException if a text is longer than the lines
+        hold, rather than cutting it off.
+    """
+    limit = TEXT_LINES * TEXT_LINE_LENGTH
+    for i, text in enumerate(texts):
+        if len(text) > limit:
+            raise tdfx_codec.TdfxImportException(
+                f"text {i}: {text!r} is {len(text)} characters, at most {limit} fit")
+    return [[text[line * TEXT_LINE_LENGTH:(line + 1) * TEXT_LINE_LENGTH] for text in texts]
+            for line in range(TEXT_LINES)]
+
+#######################################################
+def _column(values, dtype, size, name):
+    values = numpy.asarray(values)
+    if numpy.issubdtype(dtype, numpy.integer) and values.size:
+        low, high = INT_RANGES.get(name, (0, 255))
+        bad = (values < low) | (values > high)
+        if bad.any():
+            raise tdfx_codec.TdfxImportException(
+                f"{name}: {values[bad].flat[0]} is out of range {low}..{high}")
+    column = values.astype(dtype)
+    return column.reshape(-1, size) if size > 1 else column.reshape(-1)
+
+#######################################################
+class EffectTable:
+    """
+    Array-backed table of 2DFX effects.
+
+    Every numeric field is one NumPy column and every string field is a
+    column of indices into a pool of interned strings, so a row costs tens
+    of bytes instead of a dict or an object per effect. Filtering works on
+    whole columns, e.g. table.select(table.corona_far_clip > 50.0).
+    """
+
+    def __init__(self, count=0):
+        self.strings = []
+        self._string_index = {}
+
+        self.type = numpy.zeros(count, dtype=numpy.uint8)
+        for name, dtype, size in NUMERIC_FIELDS:
+            column = numpy.empty((count, size) if size > 1 else count, dtype=dtype)
+            column[...] = DEFAULTS[name]
+            setattr(self, name, column)
+        for name in STRING_FIELDS:
+            setattr(self, name, numpy.full(count, self.intern(DEFAULTS[name]),
+                                           dtype=numpy.int32))
+
+    #######################################################
+    def __len__(self):
+        return len(self.type)
+
+    #######################################################
+    def __iter__(self):
+        return iter(self.to_effects())
+
+    #######################################################
+    @property
+    def nbytes(self):
+        """Memory held by the columns and the string pool."""
+        size = self.type.nbytes
+        for name, _, _ in NUMERIC_FIELDS:
+            size += getattr(self, name).nbytes
+        for name in STRING_FIELDS:
+            size += getattr(self, name).nbytes
+        return size + sum(len(string) for string in self.strings)
+
+    #######################################################
+    def intern(self, string):
+        """Return the pool index of a string, adding it when new."""
+        index = self._string_index.get(string)
+        if index is None:
+            index = len(self.strings)
+            self.strings.append(string)
+            self._string_index[string] = index
+        return index
+
+    #######################################################
+    def string_column(self, name):
+        """Return a string field as a list of Python strings."""
+        strings = self.strings
+        return [strings[index] for index in getattr(self, name).tolist()]
+
+    #######################################################
+    @classmethod
+    def from_effects(cls, effects):
+        """Build a table from effect dicts. Unknown types are skipped."""
+        effects = [effect for effect in effects if effect["type"] in EFFECT_TYPES]
+        table = cls(0)
+
+        table.type = numpy.array([EFFECT_TYPES.index(effect["type"])
+                                  for effect in effects], dtype=numpy.uint8)
+        for name, dtype, size in NUMERIC_FIELDS:
+            default = DEFAULTS[name]
+            setattr(table, name, _column(
+                [effect.get(name, default) for effect in effects], dtype, size, name))
+
+        intern = table.intern
+        for name in STRING_FIELDS:
+            default = DEFAULTS[name]
+            setattr(table, name, numpy.array(
+                [intern(effect.get(name, default)) for effect in effects],
+                dtype=numpy.int32))
+
+        return table
+
+    #######################################################
+    @classmethod
+    def from_light_columns(cls, columns):
+        """Build a light table from tdfx_codec.read_light_columns output."""
+        count = len(columns["position"])
+        table = cls(count)
+
+        for name, dtype, size in NUMERIC_FIELDS:
+            if name in columns:
+                setattr(table, name, _column(columns[name], dtype, size, name))
+
+        for name in ("corona_tex_name", "shadow_tex_name"):
+            # Intern each distinct name once, then map the whole column
+            names, inverse = numpy.unique(columns[name], return_inverse=True)
+            indices = numpy.array([table.intern(value.decode('utf-8', 'ignore'))
+                                   for value in names.tolist()], dtype=numpy.int32)
+            setattr(table, name, indices[inverse.reshape(-1)])
+
+        return table
+
+    #######################################################
+    @classmethod
+    def from_container(cls, container, types=None):
+        """
+        Build a table from a tdfx_codec.EffectContainer.
+
+        Lights are taken from their section in one vectorized step, so rows
+        are grouped by type rather than kept in export order.
+        """
+        if types is None:
+            types = EFFECT_TYPES
+
+        tables = []
+        if "LIGHT" in types and container.count("LIGHT"):
+            tables.append(cls.from_light_columns(container.light_columns()))
+
+        others = [effect_type for effect_type in types
+                  if effect_type != "LIGHT" and container.count(effect_type)]
+        if others:
+            tables.append(cls.from_effects(container.effects(types=others)))
+
+        return cls.concatenate(tables)
+
+    #######################################################
+    @classmethod
+    def concatenate(cls, tables):
+        """Join tables into one, merging their string pools."""
+        tables = list(tables)
+        table = cls(0)
+
+        table.type = numpy.concatenate([part.type for part in tables]
+                                       or [table.type])
+        for name, _, _ in NUMERIC_FIELDS:
+            setattr(table, name, numpy.concatenate(
+                [getattr(part, name) for part in tables] or [getattr(table, name)]))
+
+        remaps = [numpy.array([table.intern(string) for string in part.strings],
+                              dtype=numpy.int32)
+                  for part in tables]
+        for name in STRING_FIELDS:
+            setattr(table, name, numpy.concatenate(
+                [remap[getattr(part, name)] for part, remap in zip(tables, remaps)]
+                or [getattr(table, name)]))
+
+        return table
+
+    #######################################################
+    def select(self, rows):
+        """Return a new table of the rows picked by a mask or index array."""
+        table = EffectTable(0)
+        table.strings = self.strings
+        table._string_index = self._string_index
+
+        table.type = self.type[rows]
+        for name, _, _ in NUMERIC_FIELDS:
+            setattr(table, name, getattr(self, name)[rows])
+        for name in STRING_FIELDS:
+            setattr(table, name, getattr(self, name)[rows])
+
+        return table
+
+    #######################################################
+    def of_type(self, effect_type):
+        return self.select(self.type == EFFECT_TYPES.index(effect_type))
+
+    #######################################################
+    def types(self):
+        return [EFFECT_TYPES[code] for code in self.type.tolist()]
+
+    #######################################################
+    def to_effects(self):
+        """Turn the table back into effect dicts."""
+        values = {name: getattr(self, name).tolist() for name, _, _ in NUMERIC_FIELDS}
+        values.update((name, self.string_column(name)) for name in STRING_FIELDS)
+        vectors = {name for name, _, size in NUMERIC_FIELDS if size > 1}
+
+        effects = []
+        for i, effect_type in enumerate(self.types()):
+            effect = {"type": effect_type, "position": tuple(values["position"][i])}
+            for name in TYPE_FIELDS[effect_type]:
+                value = values[name][i]
+                effect[name] = tuple(value) if name in vectors else value
+            effects.append(effect)
+
+        return effects
+
+    #######################################################
+    def registry_columns(self):
+        """
+        Columns named after the scene registry fields, for
+        tdfx_ot.register_effects(columns=...).
+
+        Raises:
+            tdfx_codec.TdfxImportException if a text does not fit the
+            registry's text lines.
+        """
+        columns = {name: getattr(self, name) for name, _, _ in NUMERIC_FIELDS[1:]}
+        for name in ("corona_tex_name", "shadow_tex_name", "psys"):
+            columns[name] = self.string_column(name)
+
+        lines = split_text_lines(self.string_column("text_data"))
+        for line, texts in enumerate(lines):
+            columns[f"text{line + 1}"] = texts
+        return columns
+
+    #######################################################
+    def light_records(self):
+        """Light rows as a tdfx_codec.LIGHT_DTYPE record array."""
+        lights = self.of_type("LIGHT")
+        records = numpy.zeros(len(lights), dtype=tdfx_codec.LIGHT_DTYPE)
+
+        for name in tdfx_codec.LIGHT_DTYPE.names:
+            if name in ("padding", "corona_tex_name", "shadow_tex_name"):
+                continue
+            records[name] = getattr(lights, name)
+
+        pool = numpy.array([string.encode('utf-8') for string in lights.strings],
+                           dtype="S24")
+        records["corona_tex_name"] = pool[lights.corona_tex_name]
+        records["shadow_tex_name"] = pool[lights.shadow_tex_name]
+        return records
@@ -0,0 +1,15 @@
+import os
+import sys
+import types
+
+# The 2DFX codec, table and log modules have no bpy dependency, but the
+# package __init__ registers the add-on with Blender. Register the package
+# directory without running it, so the tests can import those modules with
+# their relative imports intact.
+PACKAGE = "tdfx_addon"
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if PACKAGE not in sys.modules:
+    package = types.ModuleType(PACKAGE)
+    package.__path__ = [PACKAGE_DIR]
+    sys.modules[PACKAGE] = package
@@ -0,0 +1,255 @@
+import struct
+
+import pytest
+
+from tdfx_addon import tdfx_codec
+
+
+def light(x=1.0, **fields):
+    effect = {"type": "LIGHT", "position": (x, 2.0, 3.0)}
+    effect.update(fields)
+    return effect
+
+
+MIXED = [
+    light(color=(10, 20, 30, 40), corona_tex_name="coronaringa"),
+    {"type": "PARTICLE", "position": (4.0, 5.0, 6.0), "psys": "prt_smoke"},
+    light(x=7.0, shadow_z_distance=12, flags2=2),
+    {"type": "TEXT", "position": (8.0, 9.0, 10.0), "text_data": "Grove Street"},
+]
+
+
+def normalized(effects):
+    """Effects as the text format writes them, so float32 round-off compares equal."""
+    return tdfx_codec.parse_text(tdfx_codec.format_text(effects))
+
+
+# Binary and text round trips
+
+def test_light_text_binary_text_round_trip(tmp_path):
+    effects = normalized([light(), light(x=-5.5, pointlight_range=4.0, flags2=3)])
+    binary = tmp_path / "lights.bin"
+    text = tmp_path / "lights.2dfx"
+
+    tdfx_codec.write_effects(str(binary), effects)
+    tdfx_codec.write_text(str(text), tdfx_codec.read_binary(str(binary)))
+
+    assert tdfx_codec.read_text(str(text)) == effects
+
+
+def test_container_round_trip_keeps_order_and_types(tmp_path):
+    path = tmp_path / "mixed.bin"
+    tdfx_codec.write_container(str(path), MIXED)
+
+    assert tdfx_codec.is_container(str(path))
+    assert normalized(tdfx_codec.read_binary(str(path))) == normalized(MIXED)
+
+
+def test_mixed_count_prefixed_file_is_rejected(tmp_path):
+    path = tmp_path / "mixed.bin"
+    tdfx_codec.write_effects(str(path), [light()] + MIXED[1:2] * 3)
+
+    with pytest.raises(tdfx_codec.TdfxImportException, match="light-only"):
+        tdfx_codec.read_binary(str(path))
+
+
+def test_count_prefixed_packing_matches_struct_layout():
+    data = bytes(tdfx_codec.pack_effects([light()]))
+
+    assert data[:4] == struct.pack("<I", 1)
+    assert len(data) == 4 + tdfx_codec.LIGHT_STRUCT.size
+
+
+# Validation
+
+def test_validate_effects_lists_problems_by_entry():
+    effects = [
+        light(color=(300, 0, 0, 0)),
+        {"type": "FOG", "position": (0.0, 0.0, 0.0)},
+        light(position=(float("nan"), 0.0, 0.0), corona_tex_name="x" * 30),
+        light(view_vector=(1, 2)),
+    ]
+
+    with pytest.raises(tdfx_codec.TdfxExportException) as error:
+        tdfx_codec.validate_effects(effects)
+
+    assert str(error.value).splitlines() == [
+        "5 problems found, nothing was written:",
+        "entry 0: color (300, 0, 0, 0) is out of range 0-255",
+        "entry 1: unknown type 'FOG'",
+        "entry 2: position (nan, 0.0, 0.0) is not finite",
+        "entry 2: corona_tex_name is 30 bytes, at most 24 fit",
+        "entry 3: view_vector (1, 2) is not 3 numbers",
+    ]
+
+
+def test_validate_effects_caps_the_report():
+    effects = [light(flags1=-1) for _ in range(25)]
+
+    with pytest.raises(tdfx_codec.TdfxExportException) as error:
+        tdfx_codec.validate_effects(effects)
+
+    lines = str(error.value).splitlines()
+    assert len(lines) == 1 + tdfx_codec.MAX_REPORTED_ERRORS + 1
+    assert lines[-1] == f"... and {25 - tdfx_codec.MAX_REPORTED_ERRORS} more"
+
+
+def test_validate_effects_without_numpy(monkeypatch):
+    monkeypatch.setattr(tdfx_codec, "numpy", None)
+
+    with pytest.raises(tdfx_codec.TdfxExportException, match="entry 1: color"):
+        tdfx_codec.validate_effects([light(), light(color=(0, 0, 256, 0))])
+
+
+def test_slot_limits_only_apply_to_fixed_slots():
+    effects = [{"type": "TEXT", "position": (0.0, 0.0, 0.0), "text_data": "t" * 65}]
+
+    tdfx_codec.validate_effects(effects)
+    with pytest.raises(tdfx_codec.TdfxExportException, match="at most 64 fit"):
+        tdfx_codec.validate_effects(effects, fixed_slots=True)
+
+
+def test_failed_validation_keeps_the_previous_file(tmp_path):
+    path = tmp_path / "lights.bin"
+    path.write_bytes(b"previous")
+
+    with pytest.raises(tdfx_codec.TdfxExportException):
+        tdfx_codec.write_effects(str(path), [light(flags2=512)])
+
+    assert path.read_bytes() == b"previous"
+
+
+# Indexed container
+
+@pytest.fixture
+def container_path(tmp_path):
+    path = tmp_path / "effects.bin"
+    effects = [light(x=float(i)) if i % 3 else
+               {"type": "PARTICLE", "position": (float(i), 0.0, 0.0), "psys": f"prt_{i}"}
+               for i in range(30)]
+    tdfx_codec.write_container(str(path), effects)
+    return path
+
+
+def test_container_slices_and_entries(container_path):
+    with tdfx_codec.EffectContainer(str(container_path)) as container:
+        assert len(container) == 30
+        assert container.count("LIGHT") == 20
+        assert container.count("PARTICLE") == 10
+        assert container.count("TEXT") == 0
+
+        assert [effect["position"][0] for effect in container.effects(10, 15)] == \
+            [10.0, 11.0, 12.0, 13.0, 14.0]
+        assert container.entry(12) == {"type": "PARTICLE", "position": (12.0, 0.0, 0.0),
+                                       "psys": "prt_12"}
+        assert all(effect["type"] == "PARTICLE"
+                   for effect in container.effects(types=("PARTICLE",)))
+
+        columns = container.light_columns(5, 8)
+        assert columns["position"][:, 0].tolist() == [8.0, 10.0, 11.0]
+        assert "padding" not in columns
+
+
+@pytest.mark.parametrize("size", [0, 6, 40, -1])
+def test_truncated_container_is_rejected(container_path, size):
+    data = container_path.read_bytes()
+    container_path.write_bytes(data[:size])
+
+    with pytest.raises(tdfx_codec.TdfxImportException):
+        tdfx_codec.EffectContainer(str(container_path))
+
+
+# 2d Effect section
+
+def section_entry(entry_type, data, position=(1.0, 2.0, 3.0)):
+    return tdfx_codec.SECTION_ENTRY_STRUCT.pack(*position, entry_type, len(data)) + data
+
+
+def test_unpack_effect_section_dispatches_on_entry_type():
+    light_data = tdfx_codec.SECTION_LIGHT_STRUCT.pack(
+        1, 2, 3, 4, 100.0, 18.0, 1.5, 8.0, 4, 0, 1, 40, 1,
+        b"coronastar", b"shad_exp", 0, 2, 200, 10, 0)
+    sign_data = tdfx_codec.SECTION_ROADSIGN_STRUCT.pack(
+        2.0, 1.0, 0.0, 0.0, 90.0, 5, b"GROVE".ljust(16, b"\0") + b"STREET")
+    body = (struct.pack("<I", 4) +
+            section_entry(0, light_data) +
+            section_entry(1, b"prt_smoke".ljust(24, b"\0")) +
+            section_entry(7, sign_data) +
+            section_entry(3, b"\x01\x02"))
+
+    effects = tdfx_codec.unpack_effect_section(b"header" + body, offset=6)
+
+    assert [effect["type"] for effect in effects] == ["LIGHT", "PARTICLE", "TEXT", "SUN_GLARE"]
+    assert effects[0]["color"] == (1, 2, 3, 4)
+    assert effects[0]["corona_size"] == 1.5
+    assert effects[0]["view_vector"] == (200, 10, 0)
+    assert effects[1]["psys"] == "prt_smoke"
+    assert effects[2]["text_data"] == "GROVE           STREET"
+    assert effects[2]["rotation"] == (0.0, 0.0, 90.0)
+    assert effects[2]["flags"] == 5
+    assert effects[3]["entry_type"] == 3
+    assert effects[3]["data"] == b"\x01\x02"
+
+
+def test_unpack_effect_section_light_without_look_direction():
+    data = tdfx_codec.SECTION_LIGHT_STRUCT.pack(
+        *(0,) * 4, *(0.0,) * 4, *(0,) * 5, b"", b"", 0, 0, 0, 0, 0)[:-5]
+    effects = tdfx_codec.unpack_effect_section(struct.pack("<I", 1) + section_entry(0, data))
+
+    assert effects[0]["type"] == "LIGHT"
+    assert "view_vector" not in effects[0]
+
+
+@pytest.mark.parametrize("cut", [2, 10, 30])
+def test_truncated_effect_section_is_rejected(cut):
+    body = struct.pack("<I", 1) + section_entry(1, b"prt_smoke".ljust(24, b"\0"))
+
+    with pytest.raises(tdfx_codec.TdfxImportException):
+        tdfx_codec.unpack_effect_section(body[:-cut])
+
+
+# Command line
+
+def write_lights_text(path):
+    path.write_text(tdfx_codec.format_text([light(), light(x=2.0)]), encoding="latin-1")
+
+
+def test_cli_converts_a_tree(tmp_path):
+    source = tmp_path / "src"
+    (source / "sub").mkdir(parents=True)
+    write_lights_text(source / "a.2dfx")
+    write_lights_text(source / "sub" / "b.2dfx")
+    out = tmp_path / "out"
+
+    assert tdfx_codec.main(["to-binary", str(source), str(out), "-j", "1"]) == 0
+    assert tdfx_codec.main(["to-text", str(out / "sub" / "b.bin"), str(tmp_path)]) == 0
+    assert len(tdfx_codec.read_text(str(tmp_path / "b.2dfx"))) == 2
+
+
+def test_cli_fails_on_a_missing_source(tmp_path, capsys):
+    assert tdfx_codec.main(["to-binary", str(tmp_path / "missing")]) == 1
+    assert "does not exist" in capsys.readouterr().err
+
+
+def test_cli_fails_on_a_directory_without_sources(tmp_path):
+    assert tdfx_codec.main(["to-binary", str(tmp_path)]) == 1
+
+
+def test_cli_refuses_mixed_count_prefixed_output(tmp_path, capsys):
+    source = tmp_path / "mixed.2dfx"
+    source.write_text(tdfx_codec.format_text(MIXED), encoding="latin-1")
+
+    assert tdfx_codec.main(["to-binary", str(source)]) == 1
+    assert "--indexed" in capsys.readouterr().err
+    assert not (tmp_path / "mixed.bin").exists()
+
+    assert tdfx_codec.main(["to-binary", str(source), "--indexed"]) == 0
+    assert tdfx_codec.main(["to-text", str(tmp_path / "mixed.bin"),
+                            str(tmp_path / "back.2dfx")]) == 0
+    assert len(tdfx_codec.read_text(str(tmp_path / "back.2dfx"))) == len(MIXED)
+
+
+def test_cli_reports_unreadable_files(tmp_path):
+    (tmp_path / "bad.2dfx").write_text("2dfxType LIGHT\nPosition 1 2\n", encoding="latin-1")
+
+    assert tdfx_codec.main(["to-binary", str(tmp_path / "bad.2dfx")]) == 1
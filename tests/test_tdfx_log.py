@@ -0,0 +1,59 @@
+import importlib
+import logging
+
+import pytest
+
+from tdfx_addon import tdfx_log
+
+
+def test_summary_lists_counters_and_timers_in_order():
+    stats = tdfx_log.Stats("Export")
+    stats.count("objects scanned", 3)
+    stats.count("objects scanned")
+    stats.count("bytes written", 2048)
+    with stats.timer("pack"):
+        pass
+
+    summary = stats.summary()
+
+    assert summary.startswith("Export: 4 objects scanned, 2.0 KB written in ")
+    assert summary.endswith("s)")
+    assert "(pack " in summary
+
+
+def test_empty_summary():
+    assert tdfx_log.Stats("Import").summary().startswith("Import: nothing done in ")
+
+
+def test_session_replaces_the_module_stats():
+    stats = tdfx_log.session("Import")
+    tdfx_log.count("files")
+    with tdfx_log.timer("parse"):
+        pass
+
+    assert tdfx_log.stats is stats
+    assert stats.counters == {"files": 1}
+    assert list(stats.timers) == ["parse"]
+
+
+def test_set_level():
+    level = tdfx_log.log.level
+    try:
+        tdfx_log.set_level("debug")
+        assert tdfx_log.log.level == logging.DEBUG
+        tdfx_log.set_level(logging.WARNING)
+        assert tdfx_log.log.level == logging.WARNING
+    finally:
+        tdfx_log.log.setLevel(level)
+
+
+@pytest.mark.parametrize("value, level", [("debug", logging.DEBUG), ("WARNING", logging.WARNING),
+                                          ("loud", logging.INFO)])
+def test_log_level_from_environment(monkeypatch, value, level):
+    monkeypatch.setenv("TDFX_LOG_LEVEL", value)
+    previous = tdfx_log.log.level
+    try:
+        importlib.reload(tdfx_log)
+        assert tdfx_log.log.level == level
+    finally:
+        tdfx_log.log.setLevel(previous)
@@ -0,0 +1,94 @@
+import numpy
+import pytest
+
+from tdfx_addon import tdfx_codec
+from tdfx_addon.tdfx_table import EffectTable
+
+
+EFFECTS = [
+    {"type": "LIGHT", "position": (1.0, 2.0, 3.0), "color": (10, 20, 30, 40),
+     "corona_far_clip": 60.0, "corona_tex_name": "coronaringa"},
+    {"type": "PARTICLE", "position": (4.0, 5.0, 6.0), "psys": "prt_smoke"},
+    {"type": "TEXT", "position": (7.0, 8.0, 9.0), "text_data": "Grove Street",
+     "size": (2.0, 1.0), "rotation": (0.0, 0.0, 90.0), "flags": 17},
+    {"type": "LIGHT", "position": (-1.0, 0.0, 0.5), "view_vector": (-12, 100, 0)},
+]
+
+
+def test_effects_round_trip():
+    table = EffectTable.from_effects(EFFECTS)
+    effects = table.to_effects()
+
+    assert len(table) == 4
+    assert table.types() == ["LIGHT", "PARTICLE", "TEXT", "LIGHT"]
+    assert effects[0]["color"] == (10, 20, 30, 40)
+    assert effects[0]["corona_tex_name"] == "coronaringa"
+    assert effects[1] == EFFECTS[1]
+    assert effects[2] == EFFECTS[2]
+    assert effects[3]["view_vector"] == (-12, 100, 0)
+    assert effects[3]["corona_tex_name"] == tdfx_codec.LIGHT_DEFAULTS["corona_tex_name"]
+
+
+def test_select_and_of_type_share_the_string_pool():
+    table = EffectTable.from_effects(EFFECTS)
+    far = table.select(table.corona_far_clip > 80.0)
+
+    assert far.types() == ["PARTICLE", "TEXT", "LIGHT"]
+    assert far.strings is table.strings
+    assert table.of_type("LIGHT").position[:, 0].tolist() == [1.0, -1.0]
+
+
+def test_out_of_range_integers_are_rejected():
+    effect = {"type": "LIGHT", "position": (0.0, 0.0, 0.0), "flags1": 256}
+
+    with pytest.raises(tdfx_codec.TdfxImportException, match="flags1"):
+        EffectTable.from_effects([effect])
+
+
+def test_concatenate_merges_string_pools():
+    first = EffectTable.from_effects(EFFECTS[:2])
+    second = EffectTable.from_effects(EFFECTS[2:])
+    table = EffectTable.concatenate([first, second])
+
+    assert table.to_effects() == EffectTable.from_effects(EFFECTS).to_effects()
+
+
+def test_from_container_groups_rows_by_type(tmp_path):
+    path = tmp_path / "effects.bin"
+    tdfx_codec.write_container(str(path), EFFECTS)
+
+    with tdfx_codec.EffectContainer(str(path)) as container:
+        table = EffectTable.from_container(container)
+        particles = EffectTable.from_container(container, types=("PARTICLE",))
+
+    assert table.types() == ["LIGHT", "LIGHT", "PARTICLE", "TEXT"]
+    assert table.string_column("psys")[2] == "prt_smoke"
+    assert particles.types() == ["PARTICLE"]
+
+
+def test_light_records_match_the_binary_layout(tmp_path):
+    path = tmp_path / "lights.bin"
+    lights = [effect for effect in EFFECTS if effect["type"] == "LIGHT"]
+    tdfx_codec.write_effects(str(path), lights)
+
+    columns = tdfx_codec.read_light_columns(str(path))
+    records = EffectTable.from_effects(EFFECTS).light_records()
+
+    for name, column in columns.items():
+        assert numpy.array_equal(records[name], column), name
+    assert EffectTable.from_light_columns(columns).to_effects()[0]["color"] == (10, 20, 30, 40)
+
+
+def test_registry_columns_split_text_into_lines():
+    table = EffectTable.from_effects([EFFECTS[2]])
+    columns = table.registry_columns()
+
+    assert columns["text1"] == ["Grove Street"]
+    assert columns["text2"] == columns["text3"] == columns["text4"] == [""]
+
+
+def test_registry_columns_reject_text_past_the_four_lines():
+    effect = {"type": "TEXT", "position": (0.0, 0.0, 0.0), "text_data": "x" * 65}
+
+    with pytest.raises(tdfx_codec.TdfxImportException, match="at most 64 fit"):
+        EffectTable.from_effects([effect]).registry_columns()
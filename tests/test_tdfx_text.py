@@ -0,0 +1,48 @@
+import pytest
+
+from tdfx_addon import tdfx_codec
+
+
+EFFECTS = [
+    {"type": "LIGHT", "position": (1.5, -2.0, 3.25), "corona_tex_name": " coronastar"},
+    {"type": "PARTICLE", "position": (0.0, 0.0, 0.0), "psys": "  prt_smoke "},
+    {"type": "TEXT", "position": (4.0, 5.0, 6.0), "text_data": "  padded  text  "},
+]
+
+
+def test_padded_strings_round_trip():
+    text = tdfx_codec.format_text(EFFECTS)
+    effects = tdfx_codec.parse_text(text)
+
+    assert effects[0]["corona_tex_name"] == " coronastar"
+    assert effects[1]["psys"] == "  prt_smoke "
+    assert effects[2]["text_data"] == "  padded  text  "
+    assert tdfx_codec.format_text(effects) == text
+
+
+def test_crlf_lines_keep_values(tmp_path):
+    path = tmp_path / "effects.txt"
+    tdfx_codec.write_text(str(path), EFFECTS)
+
+    assert tdfx_codec.read_text(str(path)) == tdfx_codec.parse_text(tdfx_codec.format_text(EFFECTS))
+
+
+def test_unpadded_lines_still_parse():
+    effects = tdfx_codec.parse_text("2dfxType TEXT\nPosition 1 2 3\nTextData hi there\n")
+
+    assert effects == [{"type": "TEXT", "position": (1.0, 2.0, 3.0), "text_data": "hi there"}]
+
+
+def test_bad_component_count_names_the_line():
+    with pytest.raises(tdfx_codec.TdfxImportException, match="Line 2"):
+        tdfx_codec.parse_text("2dfxType LIGHT\nPosition 1 2\n")
+
+
+@pytest.mark.parametrize("text", ["snow ☃", "two\nlines"])
+def test_write_text_rejects_unwritable_strings(tmp_path, text):
+    path = tmp_path / "effects.txt"
+    effect = {"type": "TEXT", "position": (0.0, 0.0, 0.0), "text_data": text}
+
+    with pytest.raises(tdfx_codec.TdfxExportException, match="text_data"):
+        tdfx_codec.write_text(str(path), [effect])
+    assert not path.exists()